@@ -1,14 +1,14 @@
 import logging
 import threading
-import time
 import datetime as dt
 import tkinter as tk
 from watchdog.observers import Observer
 
 from .logging_setup import setup_logging
 from .config import load_or_create_config, save_config
-from .paths import METADATA_FILE, CLOUD_DIR
+from .paths import METADATA_FILE, METADATA_DB, CLOUD_DIR
 from .core.models import MetadataDB
+from .utils import hash_algo_for
 from .telegram.dual_client import DualTelegramClient, PYRO_AVAILABLE
 from .workers.upload_pool import UploadPool
 from .ui.gui import TGCloudGUI
@@ -59,11 +59,12 @@ class App:
         logging.info("Booting TGCloud App…")
 
         # Load config (prompts only if credentials.json missing)
-        self.cfg = load_or_create_config(prompt_cb=prompt_credentials_gui)
-        save_config(self.cfg)
+        self.cfg, dirty = load_or_create_config(prompt_cb=prompt_credentials_gui)
+        if dirty:
+            save_config(self.cfg)
 
         # Metadata (uploaded files, backup timestamp, etc.)
-        self.meta = MetadataDB.load(METADATA_FILE)
+        self.meta = MetadataDB.load(METADATA_DB, legacy_json=METADATA_FILE)
 
         # Telegram engines (Bot + optional Pyrogram user client on own loop)
         self.tg = DualTelegramClient(self.cfg)
@@ -94,11 +95,17 @@ class App:
 
         # Filesystem watcher on the sync folder
         self.observer = Observer()
-        self.observer.schedule(FolderEventHandler(self.pool), str(CLOUD_DIR), recursive=True)
+        self.watch_handler = FolderEventHandler(self.pool)
+        self.observer.schedule(self.watch_handler, str(CLOUD_DIR), recursive=True)
 
-        # Daily backup thread
+        # Daily backup thread (woken early by _stop on shutdown)
+        self._stop = threading.Event()
         self.backup_thread = threading.Thread(target=self._daily_backup_loop, name="daily-backup", daemon=True)
 
+        # Metadata saver: coalesces upload completions into one write per 500 ms
+        self.saver_thread = threading.Thread(target=self.meta.run_saver, args=(self._stop,),
+                                             name="meta-saver", daemon=True)
+
         # Bot command thread
         # IMPORTANT: create_backup_cb must return a Path WITHOUT enqueuing; the bot thread will only call it.
         # We wire a wrapper that creates the zip and returns its path; the UI/worker will handle enqueue separately.
@@ -118,7 +125,8 @@ class App:
         """Create a backup ZIP and return its path (without enqueue); used by /backup command."""
         from .core.backup import create_zip_backup
         try:
-            zip_path = create_zip_backup(self.meta, refresh_table_cb=self.gui.refresh_table)
+            zip_path = create_zip_backup(self.meta, refresh_table_cb=self.gui.refresh_table,
+                                         hash_algo=hash_algo_for(self.cfg), pool=self.pool)
             logging.info("Backup created via bot request: %s", zip_path.name)
             return zip_path
         except Exception as e:
@@ -127,7 +135,7 @@ class App:
 
     def _daily_backup_loop(self):
         """Runs once a day at configured HH:MM; creates ZIP and enqueues it."""
-        while True:
+        while not self._stop.is_set():
             try:
                 hh, mm = map(int, self.cfg.get("daily_backup_time", "02:00").split(":"))
             except Exception:
@@ -140,15 +148,16 @@ class App:
 
             sleep_s = max(1, int((target - now).total_seconds()))
             logging.info("Daily backup sleeping %ss until %s", sleep_s, target.isoformat())
-            time.sleep(sleep_s)
+            if self._stop.wait(sleep_s):
+                return
 
             try:
                 from .core.backup import create_zip_backup
-                zip_path = create_zip_backup(self.meta, refresh_table_cb=self.gui.refresh_table)
+                zip_path = create_zip_backup(self.meta, refresh_table_cb=self.gui.refresh_table,
+                                             hash_algo=hash_algo_for(self.cfg), pool=self.pool)
                 if zip_path:
                     self.pool.enqueue(zip_path)
-                    self.meta.last_backup_iso = dt.datetime.now().isoformat(timespec="seconds")
-                    self.meta.save(METADATA_FILE)
+                    self.meta.set_last_backup(dt.datetime.now().isoformat(timespec="seconds"))
                     logging.info("Daily backup enqueued: %s", zip_path.name)
             except Exception as e:
                 logging.exception("Daily backup error: %s", e)
@@ -165,6 +174,7 @@ class App:
 
         logging.info("Starting daily backup thread…")
         self.backup_thread.start()
+        self.saver_thread.start()
 
         # Start bot command thread (optional)
         if self.bot_thread:
@@ -187,10 +197,17 @@ class App:
     def on_close(self):
         logging.info("Shutting down…")
         # Stop new work and watcher
+        self._stop.set()
         try:
             self.observer.stop()
-            self.pool.stop_event.set()
+            self.watch_handler.stop()
             self.observer.join(timeout=2)
+            self.pool.stop()
+        except Exception:
+            pass
+
+        try:
+            self.gui.shutdown()
         except Exception:
             pass
 
@@ -200,6 +217,10 @@ class App:
         except Exception:
             pass
 
+        # Synchronous flush of whatever the saver has not written yet
+        self.saver_thread.join(timeout=2)
+        self.meta.close()
+
         try:
             self.root.destroy()
         except Exception:
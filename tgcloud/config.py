@@ -17,6 +17,8 @@ DEFAULT_CONFIG = {
     "download_workers": 3,
     "daily_backup_time": "02:00",
     "use_sha256": False,
+    "hash_algo": "sha256",
+    "fast_hash": False,
     "force_user_api": True,
     "preferred_python": "py -3.11"
 }
@@ -29,15 +31,19 @@ def save_config(cfg: dict):
     with open(CREDENTIALS_FILE, "w", encoding="utf-8") as f:
         json.dump(cfg, f, indent=2)
 
-def load_or_create_config(prompt_cb=None) -> dict:
+def load_or_create_config(prompt_cb=None) -> tuple[dict, bool]:
+    """Returns (cfg, dirty); dirty is True only when the file is new or defaults were added."""
     ensure_dirs()
     if not CREDENTIALS_FILE.exists():
         cfg = DEFAULT_CONFIG.copy()
         if prompt_cb:
             prompt_cb(cfg)
-        return cfg
+        return cfg, True
     with open(CREDENTIALS_FILE, "r", encoding="utf-8") as f:
         cfg = json.load(f)
+    dirty = False
     for k, v in DEFAULT_CONFIG.items():
-        if k not in cfg: cfg[k] = v
-    return cfg
+        if k not in cfg:
+            cfg[k] = v
+            dirty = True
+    return cfg, dirty
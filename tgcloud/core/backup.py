@@ -1,23 +1,61 @@
-import zipfile, datetime as dt, os
+import io, zipfile, datetime as dt, os
 from pathlib import Path
 from ..paths import BACKUP_DIR, WORK_DIR, CLOUD_DIR
-from ..utils import make_sig
+from ..utils import SAMPLED, make_sig, new_hash, quick_fingerprint
 from .models import FileMeta
+from .zipcodec import COMPRESSLEVEL, FastZipFile, compress_type_for
 
-def create_zip_backup(meta, refresh_table_cb=None):
+
+class _HashingWriter(io.RawIOBase):
+    """
+    Write-through wrapper that hashes the archive bytes as they go to disk.
+    It reports itself unseekable, so zipfile writes strictly sequentially
+    (data descriptors instead of header back-patching) and the digest is
+    exactly that of the finished file, with no second read pass.
+    """
+    def __init__(self, f, h):
+        self._f = f
+        self._h = h
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._h.update(b)
+        n = self._f.write(b)
+        self._pos += n
+        return n
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        self._f.flush()
+
+
+def create_zip_backup(meta, refresh_table_cb=None, hash_algo=None, pool=None):
     now = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
     name = f"tgcloud_backup_{now}.zip"
     dest = BACKUP_DIR / name
-    with zipfile.ZipFile(dest, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
-        for root, _, files in os.walk(CLOUD_DIR):
-            for fn in files:
-                fp = Path(root) / fn
-                rel = fp.relative_to(CLOUD_DIR)
-                zf.write(fp, arcname=str(rel))
+    # The sampled fingerprint reads ~1 MiB of the finished file, so only full digests stream
+    h = new_hash(hash_algo) if hash_algo and hash_algo != SAMPLED else None
+    with open(dest, "wb") as raw:
+        out = _HashingWriter(raw, h) if h else raw
+        with FastZipFile(out, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=COMPRESSLEVEL) as zf:
+            for root, _, files in os.walk(CLOUD_DIR):
+                for fn in files:
+                    fp = Path(root) / fn
+                    rel = fp.relative_to(CLOUD_DIR)
+                    zf.write(fp, arcname=str(rel), compress_type=compress_type_for(fn))
+    sha = h.hexdigest() if h else (quick_fingerprint(dest) if hash_algo == SAMPLED else None)
+    st = dest.stat()
+    if pool is not None and sha:
+        pool.remember_hash(st, hash_algo, sha)  # the upload reuses it instead of rereading the ZIP
     key = str(dest.relative_to(WORK_DIR))
-    fm = FileMeta(size=dest.stat().st_size, mtime=dest.stat().st_mtime, status="pending",
-                  sig=make_sig(dest.stat().st_size, dest.stat().st_mtime))
-    meta.files[key] = fm
+    fm = FileMeta(size=st.st_size, mtime=st.st_mtime, sha256=sha, status="pending",
+                  sig=make_sig(st.st_size, st.st_mtime, sha))
+    meta.put(key, fm)
     if refresh_table_cb:
         refresh_table_cb()
     return dest
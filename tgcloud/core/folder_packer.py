@@ -1,6 +1,7 @@
-import os, zipfile, time, math, datetime, random, string, logging
+import os, zipfile, time, math, datetime, random, string, logging, queue, multiprocessing, shutil
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from .zipcodec import COMPRESSLEVEL, FastZipFile, compress_type_for
 
 try:
     from plyer import notification
@@ -8,23 +9,85 @@ except ImportError:
     notification = None
 
 MAX_ZIP_SIZE = 1.9 * 1024 * 1024 * 1024  # ~1.9 GB per zip
-WORKERS = max(2, os.cpu_count() // 2)
+WORKERS = os.cpu_count() or 2
+PROGRESS_STEP = 8 * 1024 * 1024  # workers report progress every ~8 MB
+COPY_CHUNK = 1024 * 1024
 
 def random_id(n=6):
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=n))
 
-def _read_file_bytes(path: Path):
-    """Read file bytes safely (for parallel workers)."""
-    try:
-        return path.read_bytes()
-    except Exception as e:
-        logging.error(f"Failed to read {path}: {e}")
-        return None
+def _pack_bins(entries):
+    """First-fit decreasing: group (path, size, mtime) entries into bins of ≤MAX_ZIP_SIZE bytes."""
+    bins, room = [], []
+    for entry in sorted(entries, key=lambda e: e[1], reverse=True):
+        size = entry[1]
+        for i, r in enumerate(room):
+            if size <= r:
+                bins[i].append(entry)
+                room[i] -= size
+                break
+        else:
+            bins.append([entry])  # a file bigger than the cap still gets its own part
+            room.append(MAX_ZIP_SIZE - size)
+    return bins
+
+def _walk(root):
+    """Single os.scandir pass: returns [(path, size, mtime), ...] and their total size."""
+    total, entries, stack = 0, [], [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError as e:
+            logging.error(f"Cannot list {e.filename}: {e}")
+            continue
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    elif e.is_file(follow_symlinks=False):
+                        st = e.stat(follow_symlinks=False)
+                        total += st.st_size
+                        entries.append((e.path, st.st_size, st.st_mtime))
+                except OSError:
+                    continue
+    return entries, total
+
+# Set in each worker process by ProcessPoolExecutor(initializer=...)
+_progress_q = None
+
+def _init_worker(q):
+    global _progress_q
+    _progress_q = q
+
+def _zip_bin(zip_path: str, src_folder: str, entries) -> int:
+    """Worker process: write one ZIP part; returns its size on disk."""
+    pending = 0
+    with FastZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=COMPRESSLEVEL, allowZip64=True) as zf:
+        for f, size, mtime in entries:
+            # Build the ZipInfo from the walk's stat instead of letting zf.write() stat again
+            zi = zipfile.ZipInfo(os.path.relpath(f, src_folder), date_time=max(time.localtime(mtime)[:6], (1980, 1, 1, 0, 0, 0)))
+            zi.compress_type = compress_type_for(f)
+            zi._compresslevel = COMPRESSLEVEL
+            zi.file_size = size  # lets zipfile decide on ZIP64 up front
+            zi.external_attr = 0o644 << 16
+            try:
+                with open(f, "rb") as src, zf.open(zi, "w") as dst:
+                    shutil.copyfileobj(src, dst, COPY_CHUNK)
+            except OSError as e:
+                logging.error(f"Failed to read {f}: {e}")
+            pending += size
+            if pending >= PROGRESS_STEP:
+                _progress_q.put(pending)
+                pending = 0
+    if pending:
+        _progress_q.put(pending)
+    return os.path.getsize(zip_path)
 
 def auto_zip_folder(src_folder: Path, dest_dir: Path, base_name: str = "DriveBackup", progress_queue=None):
     """
-    Compress folder into sequential ZIP parts (≤1.9 GB each).
-    Never splits files. Final ZIP may be smaller.
+    Compress folder into ZIP parts (≤1.9 GB each), one worker process per part.
+    Never splits files. Files are bin-packed, so parts are filled evenly.
     """
     src_folder = Path(src_folder)
     if not src_folder.exists():
@@ -38,19 +101,18 @@ def auto_zip_folder(src_folder: Path, dest_dir: Path, base_name: str = "DriveBac
     out_dir = zip_root / session_id
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    all_files = [f for f in src_folder.rglob("*") if f.is_file()]
-    if not all_files:
+    entries, total_bytes = _walk(src_folder)
+    if not entries:
         logging.warning(f"No files found in {src_folder}")
         return []
 
-    total_bytes = sum(f.stat().st_size for f in all_files)
-    total_zips_est = max(1, math.ceil(total_bytes / MAX_ZIP_SIZE))
+    bins = _pack_bins(entries)
+    created_zips = [out_dir / f"{base_name}_{i:03d}.zip" for i in range(1, len(bins) + 1)]
     bytes_done = 0
-    zip_index = 1
-    created_zips = []
+    completed = 0
     start_time = time.time()
 
-    logging.info(f"⚡ Zipping {len(all_files)} files → target ~{total_zips_est} zips")
+    logging.info(f"⚡ Zipping {len(entries)} files → {len(bins)} zips")
 
     def send_progress():
         if not progress_queue:
@@ -61,51 +123,35 @@ def auto_zip_folder(src_folder: Path, dest_dir: Path, base_name: str = "DriveBac
         progress_queue.put({
             "type": "progress",
             "pct": round(pct, 2),
-            "completed_zips": len(created_zips),
-            "total_zips": total_zips_est,
-            "current_zip": f"{base_name}_{zip_index:03d}.zip",
+            "completed_zips": completed,
+            "total_zips": len(bins),
+            "current_zip": created_zips[min(completed, len(bins) - 1)].name,
             "elapsed": elapsed,
             "eta": eta,
         })
 
-    # Parallel reader pool
-    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
-        zip_path = out_dir / f"{base_name}_{zip_index:03d}.zip"
-        zf = zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True)
-        current_zip_size = 0
-        created_zips.append(zip_path)
-
-        future_map = {pool.submit(_read_file_bytes, f): f for f in all_files}
-
-        for fut in as_completed(future_map):
-            f = future_map[fut]
-            rel = f.relative_to(src_folder)
-            data = fut.result()
-            if data is None:
-                continue
-
-            size = len(data)
-
-            # If next file would exceed 1.9 GB, finalize current zip
-            if current_zip_size + size > MAX_ZIP_SIZE and current_zip_size > 0:
-                zf.close()
-                logging.info(f"🧩 Finalized {zip_path.name} ({current_zip_size/1e6:.1f} MB)")
-                zip_index += 1
-                current_zip_size = 0
-                zip_path = out_dir / f"{base_name}_{zip_index:03d}.zip"
-                zf = zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True)
-                created_zips.append(zip_path)
-
-            # Write file to zip
-            zf.writestr(str(rel), data)
-            current_zip_size += size
-            bytes_done += size
-            if bytes_done % (100 * 1024 * 1024) < size:  # update roughly every 100 MB
+    # DEFLATE is CPU-bound; separate processes sidestep the GIL
+    mp_q = multiprocessing.Queue()
+    workers = min(len(bins), WORKERS)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(mp_q,)) as pool:
+        futures = {pool.submit(_zip_bin, str(z), str(src_folder), b): z for z, b in zip(created_zips, bins)}
+        not_done = set(futures)
+        last_sent = 0
+        while not_done:
+            done, not_done = wait(not_done, timeout=0.5, return_when=FIRST_COMPLETED)
+            while True:
+                try:
+                    bytes_done += mp_q.get_nowait()
+                except queue.Empty:
+                    break
+            for fut in done:
+                completed += 1
+                z = futures[fut]
+                logging.info(f"🧩 Finalized {z.name} ({fut.result()/1e6:.1f} MB)")
+            if done or bytes_done - last_sent >= 100 * 1024 * 1024:  # update roughly every 100 MB
+                last_sent = bytes_done
                 send_progress()
-
-        # Final ZIP (even if tiny)
-        zf.close()
-        logging.info(f"✅ Finalized {zip_path.name} ({current_zip_size/1e6:.1f} MB)")
+    bytes_done = total_bytes
 
     elapsed = time.time() - start_time
     mbps = (bytes_done / 1024 / 1024) / elapsed if elapsed else 0
@@ -0,0 +1,100 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Optional
+
+# Column order matches FileMeta's field order so rows map straight onto FileMeta(*row).
+FILE_COLUMNS = (
+    "size", "mtime", "sha256", "message_id", "file_id",
+    "user_message_id", "via", "status", "sig", "uploaded_at",
+)
+
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS files("
+    "rel TEXT PRIMARY KEY, size INT, mtime REAL, sha256 TEXT, message_id INT, file_id TEXT, "
+    "user_message_id INT, via TEXT, status TEXT, sig TEXT, uploaded_at TEXT) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS kv(k TEXT PRIMARY KEY, v TEXT)",
+)
+
+_SELECT = f"SELECT rel, {', '.join(FILE_COLUMNS)} FROM files"
+_UPSERT = (
+    f"INSERT INTO files(rel, {', '.join(FILE_COLUMNS)}) "
+    f"VALUES(:rel, {', '.join(':' + c for c in FILE_COLUMNS)}) "
+    f"ON CONFLICT(rel) DO UPDATE SET {', '.join(f'{c}=excluded.{c}' for c in FILE_COLUMNS)}"
+)
+
+
+class MetaStore:
+    """
+    Single-file SQLite store behind MetadataDB.
+    WAL mode lets the bot/GUI/watcher threads read while a worker writes,
+    and every change is a one-row UPSERT instead of a full-file rewrite.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(str(path), isolation_level=None, check_same_thread=False)
+        try:
+            for stmt in _PRAGMAS + _SCHEMA:
+                self.conn.execute(stmt)
+        except BaseException:
+            self.conn.close()  # release the file so a corrupt DB can be moved aside (Windows)
+            raise
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one commit (one WAL sync instead of N)."""
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def rows(self) -> list:
+        with self._lock:
+            return self.conn.execute(_SELECT).fetchall()
+
+    def upsert(self, rel: str, row: dict):
+        with self._lock:
+            self.conn.execute(_UPSERT, {"rel": rel, **row})
+
+    def upsert_many(self, rows: Iterable[dict]):
+        with self.transaction():
+            self.conn.executemany(_UPSERT, rows)
+
+    def delete(self, rel: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM files WHERE rel = ?", (rel,))
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT v FROM kv WHERE k = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: Optional[str]):
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO kv(k, v) VALUES(?, ?) ON CONFLICT(k) DO UPDATE SET v=excluded.v",
+                (key, value),
+            )
+
+    def checkpoint(self):
+        """Fold the WAL (the append-only change log) into the main file and truncate it."""
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
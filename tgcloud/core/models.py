@@ -1,8 +1,23 @@
-from dataclasses import dataclass, field, asdict
-from typing import Dict, Optional
+import bisect
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
 from pathlib import Path
 import json
 import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .metadb import MetaStore
+
+# Optional fast JSON parser for the one-time legacy import.
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 
 @dataclass
@@ -23,49 +38,236 @@ class FileMeta:
 class MetadataDB:
     files: Dict[str, FileMeta] = field(default_factory=dict)
     last_backup_iso: Optional[str] = None
+    store: Optional[MetaStore] = field(default=None, repr=False, compare=False)
+    # Guards the in-memory indexes below; writers run on upload/scan/watcher threads, /list and
+    # /download read them from the bot thread
+    _index_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+    # basename (lowercase) -> rel keys; names can repeat across sub-folders
+    _by_name: Dict[str, List[str]] = field(default_factory=lambda: defaultdict(list), init=False, repr=False, compare=False)
+    # rel keys kept in sorted order for /list (no full sort per command)
+    _sorted_keys: List[str] = field(default_factory=list, init=False, repr=False, compare=False)
+    # rel keys changed in memory but not yet written; drained by the saver thread
+    _dirty: Set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+    _dirty_event: threading.Event = field(default_factory=threading.Event, init=False, repr=False, compare=False)
+    _dirty_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
 
-    # Safe loader: automatically handles missing, empty, or corrupted metadata.json
-    @staticmethod
-    def load(path: Path) -> "MetadataDB":
-        if not path.exists():
-            logging.info("Metadata file not found, creating a new one.")
-            return MetadataDB()
+    def __post_init__(self):
+        self._sorted_keys = sorted(self.files)
+        for rel in self.files:
+            self.index_add(rel)
 
+    # Safe loader: automatically handles missing or corrupted metadata.db,
+    # and imports a legacy metadata.json the first time it runs.
+    @staticmethod
+    def load(path: Path, legacy_json: Optional[Path] = None) -> "MetadataDB":
         try:
-            text = path.read_text(encoding="utf-8").strip()
-            if not text:
-                logging.warning("Metadata file is empty — recreating.")
-                return MetadataDB()
-
-            raw = json.loads(text)
-            files = {k: FileMeta(**v) for k, v in raw.get("files", {}).items()}
-            db = MetadataDB(files=files, last_backup_iso=raw.get("last_backup_iso"))
-            logging.info(f"Loaded metadata with {len(files)} tracked file(s).")
+            store = None
+            try:
+                store = MetaStore(path)
+                rows = store.rows()
+            except sqlite3.DatabaseError as e:
+                logging.error(f"Metadata DB corrupted ({e}); recreating clean file.")
+                if store is not None:
+                    store.close()
+                MetadataDB._move_aside(path)
+                store = MetaStore(path)
+                rows = []
+
+            files = {rel: FileMeta(*vals) for rel, *vals in rows}
+            db = MetadataDB(files=files, last_backup_iso=store.get("last_backup_iso"), store=store)
+            if legacy_json and store.get("legacy_imported") is None:
+                db._import_legacy_json(legacy_json)
+            logging.info(f"Loaded metadata with {len(db.files)} tracked file(s).")
             return db
 
-        except json.JSONDecodeError as e:
-            logging.error(f"Metadata JSON corrupted ({e}); recreating clean file.")
-            backup = path.with_suffix(".corrupt.json")
+        except Exception as e:
+            # A MetadataDB without a store would silently drop every write for the session
+            logging.exception(f"Unexpected error loading metadata: {e}")
+            raise
+
+    @staticmethod
+    def _move_aside(path: Path):
+        """Move a corrupted DB (and its WAL/SHM) out of the way; raises if it cannot be moved."""
+        candidates = (path.with_suffix(".corrupt.db"),
+                      path.with_suffix(f".corrupt-{time.strftime('%Y%m%d-%H%M%S')}.db"))
+        for backup in candidates:
             try:
                 path.replace(backup)
-                logging.info(f"Corrupted metadata backed up to {backup.name}")
-            except Exception:
-                pass
-            return MetadataDB()
+            except OSError as e:
+                logging.error(f"Could not move corrupted metadata to {backup.name}: {e}")
+                continue
+            for side in ("-wal", "-shm"):
+                Path(str(path) + side).unlink(missing_ok=True)
+            logging.info(f"Corrupted metadata backed up to {backup.name}")
+            return
+        raise RuntimeError(f"Corrupted metadata {path} could not be moved aside")
 
-        except Exception as e:
-            logging.exception(f"Unexpected error loading metadata: {e}")
-            return MetadataDB()
+    def _import_legacy_json(self, path: Path):
+        """One-time migration of the old metadata.json into the SQLite store."""
+        if path.exists():
+            try:
+                data = path.read_bytes().strip()
+                raw = _loads(data) if data else {}
+                for k, v in raw.get("files", {}).items():
+                    self.files.setdefault(k, FileMeta(**v))
+                if raw.get("last_backup_iso") and not self.last_backup_iso:
+                    self.last_backup_iso = raw["last_backup_iso"]
+                self.save()
+                logging.info(f"Imported {len(raw.get('files', {}))} file(s) from {path.name}.")
+            except Exception as e:
+                logging.error(f"Could not import legacy metadata {path.name}: {e}")
+                return
+        self.store.set("legacy_imported", "1")
+
+    # -------- indexes (bot /download and /list) --------
+    def index_add(self, rel: str):
+        key = Path(rel).name.lower()
+        with self._index_lock:
+            names = self._by_name[key]
+            if rel not in names:
+                names.append(rel)
+            i = bisect.bisect_left(self._sorted_keys, rel)
+            if i == len(self._sorted_keys) or self._sorted_keys[i] != rel:
+                self._sorted_keys.insert(i, rel)
+
+    def _index_discard(self, rel: str):
+        key = Path(rel).name.lower()
+        with self._index_lock:
+            i = bisect.bisect_left(self._sorted_keys, rel)
+            if i < len(self._sorted_keys) and self._sorted_keys[i] == rel:
+                del self._sorted_keys[i]
+            names = self._by_name.get(key)
+            if names and rel in names:
+                names.remove(rel)
+                if not names:
+                    del self._by_name[key]
+
+    def find_by_name(self, name: str) -> List[str]:
+        """All tracked rel paths whose file name matches `name` (case-insensitive)."""
+        with self._index_lock:
+            return list(self._by_name.get(name.lower(), ()))
 
-    def save(self, path: Path):
+    def sorted_items(self):
+        """Yield (rel, FileMeta) in rel order without sorting the whole dict."""
+        with self._index_lock:
+            keys = list(self._sorted_keys)
+        for rel in keys:
+            fm = self.files.get(rel)
+            if fm is not None:
+                yield rel, fm
+
+    # -------- writes (one row each) --------
+    def put(self, rel: str, fm: Optional[FileMeta] = None):
+        """Track `fm` under `rel` (or persist the current entry when fm is None)."""
+        if fm is None:
+            fm = self.files[rel]
+        else:
+            self.files[rel] = fm
+        self.index_add(rel)
+        if self.store:
+            try:
+                self.store.upsert(rel, vars(fm))
+            except Exception as e:
+                logging.exception(f"Failed to save metadata for {rel}: {e}")
+
+    def put_many(self, rels: Iterable[str]):
+        """Persist several already-tracked entries in a single transaction."""
+        rels = list(rels)
+        for rel in rels:
+            self.index_add(rel)
+        if self.store:
+            try:
+                self.store.upsert_many({"rel": rel, **vars(self.files[rel])} for rel in rels)
+            except Exception as e:
+                logging.exception(f"Failed to save metadata: {e}")
+
+    # -------- deferred writes (upload workers) --------
+    def mark_dirty(self, rel: str):
+        """Queue `rel` for the next coalesced flush instead of writing it now."""
+        self.index_add(rel)
+        with self._dirty_lock:
+            self._dirty.add(rel)
+        self._dirty_event.set()
+
+    def flush(self):
+        """Write every dirty entry in one transaction."""
+        with self._dirty_lock:
+            rels, self._dirty = self._dirty, set()
+        # Entries removed/renamed since they were marked are already handled by remove()/rename()
+        rels = [rel for rel in rels if rel in self.files]
+        if rels:
+            self.put_many(rels)
+
+    def run_saver(self, stop: threading.Event, interval: float = 0.5, checkpoint_every: float = 300.0):
+        """Saver thread body: at most one flush per `interval`, final flush on stop.
+        Every `checkpoint_every` seconds with writes, the WAL is folded back and truncated."""
+        written = False
+        next_checkpoint = time.monotonic() + checkpoint_every
+        while not stop.is_set():
+            if self._dirty_event.wait(timeout=interval):
+                self._dirty_event.clear()
+                stop.wait(interval)  # let a burst of completions pile up
+                self.flush()
+                written = True
+            if written and self.store and time.monotonic() >= next_checkpoint:
+                try:
+                    self.store.checkpoint()
+                except sqlite3.Error as e:
+                    logging.warning(f"Metadata checkpoint failed: {e}")
+                written = False
+                next_checkpoint = time.monotonic() + checkpoint_every
+        self.flush()
+
+    def remove(self, rel: str):
+        self.files.pop(rel, None)
+        self._index_discard(rel)
+        if self.store:
+            try:
+                self.store.delete(rel)
+            except Exception as e:
+                logging.exception(f"Failed to remove {rel} from metadata: {e}")
+
+    def rename(self, old: str, new: str) -> int:
+        """Re-key `old` (and everything under it, for folders) to `new` in one transaction."""
+        prefix = old + os.sep
+        moved = [(k, new + k[len(old):]) for k in list(self.files) if k == old or k.startswith(prefix)]
+        for k, nk in moved:
+            self.files[nk] = self.files.pop(k)
+            self._index_discard(k)
+            self.index_add(nk)
+        if moved and self.store:
+            try:
+                with self.store.transaction():
+                    for k, nk in moved:
+                        self.store.delete(k)
+                        self.store.upsert(nk, vars(self.files[nk]))
+            except Exception as e:
+                logging.exception(f"Failed to rename {old} in metadata: {e}")
+        return len(moved)
+
+    def set_last_backup(self, iso: str):
+        self.last_backup_iso = iso
+        if self.store:
+            try:
+                self.store.set("last_backup_iso", iso)
+            except Exception as e:
+                logging.exception(f"Failed to save last backup time: {e}")
+
+    def save(self):
+        """Write every tracked entry in one transaction (migration / shutdown flush)."""
+        if not self.store:
+            return
         try:
-            data = {
-                "files": {k: asdict(v) for k, v in self.files.items()},
-                "last_backup_iso": self.last_backup_iso,
-            }
-            tmp = path.with_suffix(".tmp")
-            tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
-            tmp.replace(path)
+            self.put_many(list(self.files))
+            self.store.set("last_backup_iso", self.last_backup_iso)
             logging.debug(f"Metadata saved ({len(self.files)} files).")
         except Exception as e:
             logging.exception(f"Failed to save metadata: {e}")
+
+    def close(self):
+        self.flush()
+        if self.store:
+            try:
+                self.store.close()
+            except Exception:
+                pass
@@ -1,29 +1,53 @@
 import os
 from pathlib import Path
-from ..paths import CLOUD_DIR, METADATA_FILE
-from ..utils import sha256_of, make_sig, IGNORED_SUFFIXES
+from ..paths import CLOUD_DIR
+from ..utils import digest_of, file_hash_algo, make_sig, sig_matches_stat, IGNORED_SUFFIXES_TUPLE
 from .models import FileMeta
 
-def initial_scan_and_enqueue(cfg: dict, meta, pool):
-    for root, _, files in os.walk(CLOUD_DIR):
-        for fn in files:
-            fp = Path(root) / fn
+def _iter_files(dirp):
+    """Recursive os.scandir walk; DirEntry caches the type info from readdir."""
+    try:
+        it = os.scandir(dirp)
+    except OSError:
+        return
+    with it:
+        for e in it:
             try:
-                rel = str(fp.relative_to(CLOUD_DIR))
-            except Exception:
-                continue
-            if fp.suffix.lower() in IGNORED_SUFFIXES or fp.name.startswith("~$"):
+                if e.is_dir(follow_symlinks=False):
+                    yield from _iter_files(e.path)
+                elif e.is_file(follow_symlinks=False):
+                    yield e
+            except OSError:
                 continue
-            size = fp.stat().st_size
-            mtime = fp.stat().st_mtime
-            sha = sha256_of(fp) if cfg.get("use_sha256") else None
-            sig_now = make_sig(size, mtime, sha)
-            fm = meta.files.get(rel)
-            if fm is None:
-                meta.files[rel] = FileMeta(size=size, mtime=mtime, sha256=sha, status="pending", sig=sig_now)
+
+def initial_scan_and_enqueue(cfg: dict, meta, pool):
+    changed = []
+    prefix_len = len(str(CLOUD_DIR)) + 1
+    for e in _iter_files(CLOUD_DIR):
+        name_lower = e.name.lower()
+        if name_lower.endswith(IGNORED_SUFFIXES_TUPLE) or name_lower.startswith("~$"):
+            continue
+        try:
+            st = e.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        size, mtime = st.st_size, st.st_mtime
+        rel = e.path[prefix_len:]
+        fm = meta.files.get(rel)
+        # Quick check first: an uploaded file with the same size + mtime is not re-hashed
+        if fm is not None and fm.status == "uploaded" and sig_matches_stat(fm.sig, size, mtime):
+            continue
+        fp = Path(e.path)
+        sha = digest_of(fp, file_hash_algo(cfg)) if cfg.get("use_sha256") else None
+        sig_now = make_sig(size, mtime, sha)
+        if fm is None:
+            meta.files[rel] = FileMeta(size=size, mtime=mtime, sha256=sha, status="pending", sig=sig_now)
+            changed.append(rel)
+            pool.enqueue(fp)
+        else:
+            if fm.sig != sig_now or fm.status != "uploaded":
+                fm.size = size; fm.mtime = mtime; fm.sha256 = sha; fm.sig = sig_now; fm.status = "pending"
+                changed.append(rel)
                 pool.enqueue(fp)
-            else:
-                if fm.sig != sig_now or fm.status != "uploaded":
-                    fm.size = size; fm.mtime = mtime; fm.sha256 = sha; fm.sig = sig_now; fm.status = "pending"
-                    pool.enqueue(fp)
-    meta.save(METADATA_FILE)
+    # One transaction for the whole scan instead of one commit per file
+    meta.put_many(changed)
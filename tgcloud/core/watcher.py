@@ -1,9 +1,85 @@
+import heapq
+import logging
+import threading
+import time
 from watchdog.events import FileSystemEventHandler
 from pathlib import Path
+from ..paths import CLOUD_DIR
+from ..utils import note_file_closed, note_file_written
 
 class FolderEventHandler(FileSystemEventHandler):
-    def __init__(self, pool): self.pool = pool
+    """
+    Enqueues changed files once they have been quiet for DEBOUNCE_S.
+    watchdog fires on_modified many times while a file is being written; all
+    pending paths share one scheduler thread (min-heap of due times) instead
+    of a Timer thread per event.
+    """
+    DEBOUNCE_S = 0.5
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._due = {}    # src_path -> latest due time
+        self._heap = []   # (due, src_path); superseded entries are skipped when popped
+        self._cv = threading.Condition()
+        self._stop = threading.Event()
+        threading.Thread(target=self._run, name="watch-debounce", daemon=True).start()
+
+    def _schedule(self, src_path: str):
+        due = time.monotonic() + self.DEBOUNCE_S
+        with self._cv:
+            self._due[src_path] = due
+            heapq.heappush(self._heap, (due, src_path))
+            self._cv.notify()
+
+    def stop(self):
+        with self._cv:
+            self._stop.set()
+            self._cv.notify()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cv:
+                while True:
+                    if self._stop.is_set():
+                        return
+                    if not self._heap:
+                        self._cv.wait()
+                        continue
+                    due, p = self._heap[0]
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        self._cv.wait(delay)
+                        continue
+                    heapq.heappop(self._heap)
+                    if self._due.get(p) == due:
+                        del self._due[p]
+                        break
+            try:
+                self.pool.enqueue(Path(p))
+            except Exception as e:
+                logging.exception("Enqueue from watcher failed for %s: %s", p, e)
+
     def on_created(self, event):
-        if not event.is_directory: self.pool.enqueue(Path(event.src_path))
+        if not event.is_directory:
+            note_file_written(event.src_path)
+            self._schedule(event.src_path)
     def on_modified(self, event):
-        if not event.is_directory: self.pool.enqueue(Path(event.src_path))
+        if not event.is_directory:
+            note_file_written(event.src_path)
+            self._schedule(event.src_path)
+    def on_closed(self, event):
+        # Writer closed the file (Linux/inotify); lets the upload worker skip the stability poll
+        if not event.is_directory:
+            note_file_closed(event.src_path)
+            self._schedule(event.src_path)
+
+    def on_moved(self, event):
+        with self._cv:
+            self._due.pop(event.src_path, None)
+        try:
+            old = str(Path(event.src_path).relative_to(CLOUD_DIR))
+            new = str(Path(event.dest_path).relative_to(CLOUD_DIR))
+            self.pool.meta.rename(old, new)
+        except ValueError:
+            pass  # moved into/out of the sync folder; nothing to re-key
+        if not event.is_directory: self._schedule(event.dest_path)
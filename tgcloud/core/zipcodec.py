@@ -0,0 +1,68 @@
+import os
+import zipfile
+
+# Optional SIMD DEFLATE/CRC32 backend (isal_zlib and zlib_ng are drop-in zlib
+# replacements). Only FastZipFile writers use it; the stdlib zipfile module and
+# every reader keep stdlib zlib.
+try:
+    from isal import isal_zlib as _zlib  # pip install isal
+    COMPRESSLEVEL = 2  # isal level 2 ≈ zlib level 6 ratio, several times faster
+except ImportError:
+    try:
+        from zlib_ng import zlib_ng as _zlib  # pip install zlib-ng
+    except ImportError:
+        _zlib = None
+    COMPRESSLEVEL = 6
+
+if _zlib is None:
+    FastZipFile = zipfile.ZipFile
+else:
+    class _FastWriteFile(zipfile._ZipWriteFile):
+        # Same as the stdlib write(), with the CRC taken from the fast codec
+        def write(self, data):
+            if self.closed:
+                raise ValueError("I/O operation on closed file.")
+            if isinstance(data, (bytes, bytearray)):
+                nbytes = len(data)
+            else:
+                data = memoryview(data)
+                nbytes = data.nbytes
+            self._file_size += nbytes
+            self._crc = _zlib.crc32(data, self._crc)
+            if self._compressor:
+                data = self._compressor.compress(data)
+                self._compress_size += len(data)
+            self._fileobj.write(data)
+            return nbytes
+
+    class FastZipFile(zipfile.ZipFile):
+        """ZipFile whose member writers DEFLATE/CRC with the SIMD codec."""
+
+        def _open_to_write(self, zinfo, force_zip64=False):
+            dest = super()._open_to_write(zinfo, force_zip64)
+            dest.__class__ = _FastWriteFile
+            if zinfo.compress_type == zipfile.ZIP_DEFLATED:
+                level = zinfo._compresslevel
+                try:
+                    # Nothing has been compressed yet, so the stdlib compressor can be swapped
+                    dest._compressor = _zlib.compressobj(
+                        COMPRESSLEVEL if level is None else level, _zlib.DEFLATED, -15)
+                except Exception:
+                    pass  # level the codec rejects (isal takes 0-3): keep stdlib zlib
+            return dest
+
+# Already-compressed formats: DEFLATE burns CPU here for ~0% size gain.
+STORED_SUFFIXES = frozenset({
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic",
+    ".mp4", ".mkv", ".mov", ".avi", ".webm",
+    ".mp3", ".m4a", ".aac", ".ogg", ".opus", ".flac",
+    ".zip", ".7z", ".rar", ".gz", ".bz2", ".xz", ".zst",
+    ".docx", ".xlsx", ".pptx", ".apk", ".jar",
+})
+
+
+def compress_type_for(name: str) -> int:
+    """ZIP_STORED for already-compressed media/archives, ZIP_DEFLATED otherwise."""
+    if os.path.splitext(name)[1].lower() in STORED_SUFFIXES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
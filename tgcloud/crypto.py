@@ -1,3 +1,10 @@
+import contextlib
+import functools
+import hashlib
+
+ENC_CHUNK_SIZE = 4 * 1024 * 1024  # plaintext bytes per Fernet frame in encrypt_file
+ENC_WRITE_BUFFER = 8 * 1024 * 1024  # > one frame's token (~5.6 MB for a 4 MiB chunk)
+
 FERNET_AVAILABLE = False
 try:
     from cryptography.fernet import Fernet
@@ -9,10 +16,23 @@ try:
 except Exception:
     FERNET_AVAILABLE = False
 
-def derive_fernet_key(passphrase: str, salt: bytes) -> bytes:
+@functools.lru_cache(maxsize=8)
+def _derive(passphrase: str, salt: bytes) -> bytes:
     kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=390000, backend=default_backend())
-    key = base64.urlsafe_b64encode(kdf.derive(passphrase.encode("utf-8")))
-    return key
+    return base64.urlsafe_b64encode(kdf.derive(passphrase.encode("utf-8")))
+
+def derive_fernet_key(passphrase: str, salt: bytes) -> bytes:
+    # PBKDF2 (390k rounds) costs tens of ms; chunked/retried uploads reuse the same key
+    return _derive(passphrase, salt)
+
+def salt_for_rel(rel: str) -> bytes:
+    """Per-file PBKDF2 salt (first 16 bytes of SHA-256 of the sync-relative path)."""
+    return hashlib.sha256(rel.encode("utf-8")).digest()[:16]
+
+@functools.lru_cache(maxsize=1024)
+def file_key(passphrase: str, rel: str) -> bytes:
+    # Keyed by (passphrase, rel): a file re-uploaded after each edit derives its salt and key once
+    return _derive(passphrase, salt_for_rel(rel))
 
 def maybe_encrypt_bytes(data: bytes, passphrase: str, salt: bytes) -> bytes | None:
     if not FERNET_AVAILABLE or not passphrase:
@@ -20,3 +40,56 @@ def maybe_encrypt_bytes(data: bytes, passphrase: str, salt: bytes) -> bytes | No
     key = derive_fernet_key(passphrase, salt)
     f = Fernet(key)
     return f.encrypt(data)
+
+# -------- streamed file encryption --------
+# Layout: repeated [4-byte big-endian token length][Fernet token]. Each token's plaintext is
+# [8-byte frame index][1-byte last flag][data], so dropped, reordered or truncated frames fail
+# to decrypt. Peak memory is about one chunk plus its token instead of the whole file twice.
+
+def encrypt_file(src, dst, key: bytes, chunk_size: int = ENC_CHUNK_SIZE) -> int:
+    """
+    Encrypt `src` (a path, or an open binary file read from the start and left open)
+    into `dst` frame by frame; returns the number of bytes written.
+    """
+    f = Fernet(key)
+    written = 0
+    with contextlib.ExitStack() as stack:
+        if hasattr(src, "read"):
+            src.seek(0)
+            s = src
+        else:
+            s = stack.enter_context(open(src, "rb"))
+        # Buffer larger than a frame, so each length header goes out with its token
+        o = stack.enter_context(open(dst, "wb", buffering=ENC_WRITE_BUFFER))
+        idx = 0
+        chunk = s.read(chunk_size)
+        while True:
+            nxt = s.read(chunk_size) if chunk else b""
+            last = not nxt
+            tok = f.encrypt(idx.to_bytes(8, "big") + (b"\x01" if last else b"\x00") + chunk)
+            o.write(len(tok).to_bytes(4, "big"))
+            o.write(tok)
+            written += 4 + len(tok)
+            if last:
+                return written
+            chunk, idx = nxt, idx + 1
+
+def decrypt_file(src, dst, key: bytes) -> None:
+    """Inverse of encrypt_file. Also reads older .enc files (one Fernet token for the whole file)."""
+    f = Fernet(key)
+    with open(src, "rb") as s, open(dst, "wb") as o:
+        if s.read(1) == b"g":  # base64 Fernet tokens start with "gAAAAA"; frame headers never do
+            s.seek(0)
+            o.write(f.decrypt(s.read()))
+            return
+        s.seek(0)
+        idx = 0
+        while hdr := s.read(4):
+            body = f.decrypt(s.read(int.from_bytes(hdr, "big")))
+            if int.from_bytes(body[:8], "big") != idx:
+                raise ValueError(f"encrypted frame {idx} out of order")
+            o.write(body[9:])
+            if body[8:9] == b"\x01":
+                return
+            idx += 1
+        raise ValueError("encrypted file is truncated")
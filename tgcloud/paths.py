@@ -9,3 +9,4 @@ LOG_DIR = WORK_DIR / "logs"
 BACKUP_DIR = WORK_DIR / "backups"
 CREDENTIALS_FILE = WORK_DIR / "credentials.json"
 METADATA_FILE = WORK_DIR / "metadata.json"
+METADATA_DB = WORK_DIR / "metadata.db"
@@ -1,3 +1,4 @@
+import io
 import threading
 from pathlib import Path
 import telebot
@@ -11,36 +12,43 @@ class BotThread(threading.Thread):
         @self.bot.message_handler(commands=["start","help"])
         def _help(m):
             txt=("TGCloud Bot commands:\n"
-                 "/list - list files\n"
-                 "/download <filename> - resend a file (bot mode only)\n"
+                 "/list [pending] - list files (or only those not uploaded yet)\n"
+                 "/download <filename|path> - resend a file (bot mode only)\n"
                  "/backup - create & upload a zip backup\n"
                  "/status - summary\n")
             self.bot.reply_to(m, txt)
 
         @self.bot.message_handler(commands=["list"])
         def _list(m):
-            lines = [f"- {rel} ({fm.status})" for rel,fm in sorted(self.meta.files.items())]
-            if not lines: self.bot.reply_to(m, "No files tracked yet."); return
-            chunk,total=[],0
-            for line in lines:
-                if total+len(line)+1>3900: self.bot.send_message(m.chat.id,"\n".join(chunk)); chunk,total=[],0
-                chunk.append(line); total+=len(line)+1
-            if chunk: self.bot.send_message(m.chat.id,"\n".join(chunk))
+            args=m.text.split(maxsplit=1)
+            only_pending=len(args)>1 and args[1].strip().lower()=="pending"
+            buf=io.StringIO(); sent=False
+            for rel,fm in self.meta.sorted_items():
+                if only_pending and fm.status=="uploaded": continue
+                line=f"- {rel} ({fm.status})\n"
+                if buf.tell()+len(line)>3900:
+                    self.bot.send_message(m.chat.id,buf.getvalue().rstrip("\n")); sent=True
+                    buf=io.StringIO()
+                buf.write(line)
+            if buf.tell(): self.bot.send_message(m.chat.id,buf.getvalue().rstrip("\n")); sent=True
+            if not sent: self.bot.reply_to(m, "Nothing pending." if only_pending else "No files tracked yet.")
 
         @self.bot.message_handler(commands=["download"])
         def _download(m):
             args=m.text.split(maxsplit=1)
             if len(args)<2: self.bot.reply_to(m,"Usage: /download <filename>"); return
-            name=args[1].strip().lower()
-            for rel,fm in self.meta.files.items():
-                if Path(rel).name.lower()==name:
-                    if fm.file_id:
-                        try: self.bot.send_document(m.chat.id, fm.file_id, caption=Path(rel).name)
-                        except Exception as e: self.bot.reply_to(m, f"Send failed: {e}")
-                    else:
-                        self.bot.reply_to(m, "File not available via bot (likely >50MB). Use desktop app to download.")
-                    return
-            self.bot.reply_to(m,"Not found.")
+            name=args[1].strip()
+            rels=[name] if name in self.meta.files else self.meta.find_by_name(name)
+            if not rels: self.bot.reply_to(m,"Not found."); return
+            if len(rels)>1:
+                self.bot.reply_to(m, "Several files match:\n" + "\n".join(f"- {r}" for r in sorted(rels)) + "\nSend /download <path> to pick one.")
+                return
+            rel=rels[0]; fm=self.meta.files.get(rel)
+            if fm and fm.file_id:
+                try: self.bot.send_document(m.chat.id, fm.file_id, caption=Path(rel).name)
+                except Exception as e: self.bot.reply_to(m, f"Send failed: {e}")
+            else:
+                self.bot.reply_to(m, "File not available via bot (likely >50MB). Use desktop app to download.")
 
         @self.bot.message_handler(commands=["backup"])
         def _backup(m):
@@ -1,10 +1,19 @@
+import os
 import time
+import shutil
+import socket
+import uuid
+import queue
 import asyncio
 import threading
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.fields import RequestField
+from urllib3.util.retry import Retry
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 from ..paths import WORK_DIR
 
 PYRO_AVAILABLE = False
@@ -16,36 +25,195 @@ try:
 except Exception:
     PYRO_AVAILABLE = False
 
+UPLOAD_READ_SIZE = 1024 * 1024  # bytes pulled from the multipart encoder per send
+PROGRESS_INTERVAL = 0.25  # seconds between upload progress callbacks
+DOWNLOAD_READ_SIZE = 4 * 1024 * 1024  # bytes read from the socket per loop in bot downloads
+SEND_ATTEMPTS = 5  # sendDocument tries when Telegram answers 429
+FILE_PATH_TTL = 55 * 60  # getFile paths stay valid for about an hour
+BOT_DOWNLOAD_LIMIT = 20 * 1024 * 1024  # Bot API getFile refuses anything larger
+
+
+class _MultipartBody:
+    """
+    multipart/form-data body streamed from an open file. The field headers and the
+    closing boundary are rendered once, so a retry is just rewind() + POST again.
+    Reads hand the socket ≥UPLOAD_READ_SIZE bytes at a time.
+    """
+    def __init__(self, fields: dict, filename: str, fobj, size: int, on_read=None):
+        boundary = uuid.uuid4().hex
+        head = []
+        for name, value in fields.items():
+            rf = RequestField(name, value)
+            rf.make_multipart()
+            head.append(f"--{boundary}\r\n{rf.render_headers()}{value}\r\n")
+        rf = RequestField("document", b"", filename=filename)
+        rf.make_multipart(content_type="application/octet-stream")
+        head.append(f"--{boundary}\r\n{rf.render_headers()}")
+        self._prefix = "".join(head).encode("utf-8")
+        self._suffix = f"\r\n--{boundary}--\r\n".encode("ascii")
+        self._fobj = fobj
+        self._size = size
+        self._on_read = on_read
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self.len = len(self._prefix) + size + len(self._suffix)
+        self.bytes_read = 0
+
+    def rewind(self):
+        self._fobj.seek(0)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        want = max(size, UPLOAD_READ_SIZE) if size and size > 0 else self.len
+        file_start = len(self._prefix)
+        file_end = file_start + self._size
+        out = []
+        while want > 0 and self.bytes_read < self.len:
+            pos = self.bytes_read
+            if pos < file_start:
+                chunk = self._prefix[pos:pos + want]
+            elif pos < file_end:
+                chunk = self._fobj.read(min(want, file_end - pos))
+                if not chunk:
+                    raise IOError("file shrank while uploading")
+            else:
+                chunk = self._suffix[pos - file_end:pos - file_end + want]
+            out.append(chunk)
+            self.bytes_read += len(chunk)
+            want -= len(chunk)
+        if self._on_read:
+            self._on_read(self)
+        return b"".join(out)
+
+
+class _TunedAdapter(HTTPAdapter):
+    """HTTPAdapter whose sockets send the multipart tail immediately and keep idle connections alive."""
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self.SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+class _SpeedMeter:
+    """Exponential moving average of transfer speed between progress callbacks."""
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.speed = 0.0
+        self.last_ts = time.monotonic()
+        self.last_bytes = 0
+
+    def update(self, done: int, total: int, now: float) -> Tuple[float, float]:
+        """Fold in the interval since the last update; returns (speed, eta)."""
+        inst = (done - self.last_bytes) / max(now - self.last_ts, 1e-6)
+        self.speed = inst if not self.speed else self.alpha * inst + (1 - self.alpha) * self.speed
+        self.last_ts, self.last_bytes = now, done
+        eta = max(total - done, 0) / self.speed if self.speed > 0 else 0
+        return self.speed, eta
+
+
+class _ProgressPump:
+    """
+    Runs progress callbacks on one daemon thread so a slow GUI update never stalls
+    the socket. Only the newest event per callback is kept; stale ones are dropped.
+    """
+    def __init__(self):
+        self._latest = {}  # callback -> newest args
+        self._cv = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def post(self, cb, *args):
+        with self._cv:
+            self._latest[cb] = args
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="progress-pump", daemon=True)
+                self._thread.start()
+            self._cv.notify()
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._latest:
+                    self._cv.wait()
+                batch, self._latest = self._latest, {}
+            for cb, args in batch.items():
+                try:
+                    cb(*args)
+                except Exception as e:
+                    logging.debug("Progress callback failed: %s", e)
+
 
 class DualTelegramClient:
     BOT_LIMIT = 49 * 1024 * 1024  # ~49MB to be conservative
 
     def __init__(self, cfg: dict):
         self.cfg = cfg
-        self.rate_limit = float(cfg.get("rate_limit_seconds", 0.5))
-        self._last_call = 0.0
+        self._next_slot = 0.0  # monotonic time the next bot call may start
+        self._progress = _ProgressPump()
         self._lock = threading.Lock()
+        self.apply_settings(cfg)
 
         # Bot API basics
         self.bot_token = cfg.get("bot_token", "")
-        self.chat_id = cfg.get("chat_id", "")
         self.bot_base = f"https://api.telegram.org/bot{self.bot_token}"
         self.bot_file_base = f"https://api.telegram.org/file/bot{self.bot_token}"
+        self._url_getme = f"{self.bot_base}/getMe"
+        self._url_getfile = f"{self.bot_base}/getFile"
+        self._url_senddoc = f"{self.bot_base}/sendDocument"
+        # file_id -> (file_path, expires_at) so re-downloads skip getFile
+        self._file_path_cache: Dict[str, Tuple[str, float]] = {}
+
+        # Keep-alive sessions (reuse TCP + TLS). Small control calls (getMe/getFile) get their
+        # own pool so they always find a warm connection while long transfers hold the others.
+        try:
+            workers = max(1, int(cfg.get("num_workers", 3)))
+        except Exception:
+            workers = 3
+        # Every upload worker plus the bot/GUI downloaders can hold a transfer connection concurrently
+        self._session = self._make_session(pool_maxsize=max(16, workers + 4))
+        self._control = self._make_session(pool_maxsize=4)
 
         # User API (Pyrogram)
         self.user_client: Optional["Client"] = None
         self.user_loop: Optional[asyncio.AbstractEventLoop] = None
         self.user_ready = threading.Event()
+        self._user_thread: Optional[threading.Thread] = None
 
         self._init_user_client()
 
+    @staticmethod
+    def _make_session(pool_maxsize: int) -> requests.Session:
+        session = requests.Session()
+        # GETs (getMe/getFile/downloads) are retried with backoff here; sendDocument handles its own 429s
+        retry = Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["GET"], respect_retry_after_header=True, raise_on_status=False)
+        session.mount("https://", _TunedAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry))
+        session.headers.update({"User-Agent": "TGCloud", "Accept-Encoding": "gzip, deflate"})
+        return session
+
+    def apply_settings(self, cfg: dict):
+        """Cache the config values read on every call (re-run after Settings are saved)."""
+        self.rate_limit = float(cfg.get("rate_limit_seconds", 0.5))
+        self.chat_id = cfg.get("chat_id", "")
+        try:
+            self.chat_id_int = int(self.chat_id) if self.chat_id else None
+        except (TypeError, ValueError):
+            self.chat_id_int = None
+        self._enable_2gb = bool(cfg.get("enable_2gb_mode", False))
+        self._force_user = bool(cfg.get("force_user_api", True))
+
     # ------------- rate limit for bot calls -------------
     def _guard(self):
+        # The lock only covers reading/booking the next slot; the sleep happens outside it
         with self._lock:
-            elapsed = time.time() - self._last_call
-            if elapsed < self.rate_limit:
-                time.sleep(self.rate_limit - elapsed)
-            self._last_call = time.time()
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.rate_limit
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
 
     # ------------- user client bootstrap -------------
     def _init_user_client(self):
@@ -67,36 +235,36 @@ class DualTelegramClient:
             self.user_loop = asyncio.new_event_loop()
 
             def _runner():
+                # The loop thread only runs the loop; start/stop are scheduled onto it
                 asyncio.set_event_loop(self.user_loop)
                 try:
-                    self.user_client = Client(
-                        name="tgcloud_user",
-                        api_id=int(api_id),
-                        api_hash=api_hash,
-                        session_string=session_str,
-                        workdir=str(WORK_DIR / ".pyrogram"),
-                        no_updates=True
-                    )
-
-                    async def _start():
-                        await self.user_client.start()
-                        return True
-
-                    self.user_loop.run_until_complete(_start())
-                    self.user_ready.set()
-                    logging.info("User API client started (2GB mode ON).")
                     self.user_loop.run_forever()
                 except Exception as e:
                     logging.exception("User API loop crashed: %s", e)
-                finally:
-                    try:
-                        if self.user_client:
-                            self.user_loop.run_until_complete(self.user_client.stop())
-                    except Exception:
-                        pass
 
-            t = threading.Thread(target=_runner, name="pyrogram-loop", daemon=True)
-            t.start()
+            self._user_thread = threading.Thread(target=_runner, name="pyrogram-loop", daemon=True)
+            self._user_thread.start()
+
+            async def _start():
+                # Built on the loop so Pyrogram binds to user_loop
+                self.user_client = Client(
+                    name="tgcloud_user",
+                    api_id=int(api_id),
+                    api_hash=api_hash,
+                    session_string=session_str,
+                    workdir=str(WORK_DIR / ".pyrogram"),
+                    no_updates=True
+                )
+                await self.user_client.start()
+
+            def _started(fut):
+                if fut.cancelled() or fut.exception():
+                    logging.error("User API client failed to start: %s", None if fut.cancelled() else fut.exception())
+                    return
+                self.user_ready.set()
+                logging.info("User API client started (2GB mode ON).")
+
+            asyncio.run_coroutine_threadsafe(_start(), self.user_loop).add_done_callback(_started)
         except Exception as e:
             logging.exception("User API init failed: %s", e)
             self.user_client = None
@@ -105,75 +273,92 @@ class DualTelegramClient:
     # ------------- Bot helpers -------------
     def bot_get_me(self) -> dict:
         self._guard()
-        r = requests.get(f"{self.bot_base}/getMe", timeout=30)
+        r = self._control.get(self._url_getme, timeout=30)
         r.raise_for_status()
         return r.json()
 
-    def bot_send_document(self, file_path: Path, caption: Optional[str], progress_cb=None) -> Tuple[Optional[int], Optional[str]]:
-        from requests_toolbelt.multipart.encoder import MultipartEncoder, MultipartEncoderMonitor
-
+    def bot_send_document(self, file_path: Path, caption: Optional[str], progress_cb=None,
+                          total: Optional[int] = None, fobj=None) -> Tuple[Optional[int], Optional[str]]:
+        """Upload via the Bot API. `fobj` is an already open handle on `file_path` (left open)."""
         self._guard()
-        url = f"{self.bot_base}/sendDocument"
-        total = file_path.stat().st_size
-        start = time.time()
+        if total is None:
+            total = file_path.stat().st_size
+        meter = _SpeedMeter()
 
-        def _progress(monitor):
-            if progress_cb:
-                sent = monitor.bytes_read
-                elapsed = max(time.time() - start, 1e-6)
-                speed = sent / elapsed
-                remaining = max(total - sent, 0)
-                eta = remaining / speed if speed > 0 else 0
-                progress_cb(sent, total, speed, eta)
-
-        # robust open (windows sometimes locks files briefly)
-        for _ in range(10):
+        def _progress(body):
+            if not progress_cb:
+                return
+            sent = body.bytes_read
+            now = time.monotonic()
+            # a few callbacks per second instead of one per encoder chunk
+            if now - meter.last_ts < PROGRESS_INTERVAL and sent < body.len:
+                return
+            speed, eta = meter.update(sent, total, now)
+            self._progress.post(progress_cb, sent, total, speed, eta)
+
+        # robust open (windows sometimes locks files briefly): retry with backoff for up to 10 s
+        owned = fobj is None
+        deadline = time.monotonic() + 10
+        delay = 0.02
+        while owned:
             try:
                 fobj = open(file_path, "rb")
                 break
             except PermissionError:
-                time.sleep(0.5)
-        else:
-            return None, None
-
-        files = {"document": (file_path.name, fobj, "application/octet-stream")}
-        data = {"chat_id": self.cfg.get("chat_id", "")}
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    logging.warning("File still locked after 10s, not uploading: %s", file_path.name)
+                    return None, None
+                time.sleep(min(delay, left))
+                delay = min(delay * 2, 0.5)
+
+        fields = {"chat_id": str(self.chat_id)}
         if caption:
-            data["caption"] = caption
-        enc = MultipartEncoder(fields={**data, "document": files["document"]})
-        mon = MultipartEncoderMonitor(enc, _progress)
-        headers = {"Content-Type": mon.content_type}
-        r = requests.post(url, data=mon, headers=headers, timeout=1800)
+            fields["caption"] = caption
         try:
-            if r.status_code == 429:
-                retry_after = r.json().get("parameters", {}).get("retry_after", 5)
-                time.sleep(int(retry_after) + 1)
-                return self.bot_send_document(file_path, caption, progress_cb)
-            r.raise_for_status()
-            resp = r.json()
-            if not resp.get("ok"):
-                return None, None
-            res = resp["result"]
-            return res.get("message_id"), res.get("document", {}).get("file_id")
+            body = _MultipartBody(fields, file_path.name, fobj, total, on_read=_progress)
+            headers = {"Content-Type": body.content_type}
+            for attempt in range(SEND_ATTEMPTS):
+                body.rewind()  # same pre-rendered body; only the file position resets
+                r = self._session.post(self._url_senddoc, data=body, headers=headers, timeout=1800)
+                if r.status_code == 429 and attempt < SEND_ATTEMPTS - 1:
+                    retry_after = r.json().get("parameters", {}).get("retry_after", 5)
+                    logging.warning("sendDocument rate-limited; retrying in %ss", retry_after)
+                    time.sleep(int(retry_after) + 1)
+                    continue
+                r.raise_for_status()
+                resp = r.json()
+                if not resp.get("ok"):
+                    return None, None
+                res = resp["result"]
+                return res.get("message_id"), res.get("document", {}).get("file_id")
         finally:
-            try:
-                fobj.close()
-            except Exception:
-                pass
+            if owned:
+                try:
+                    fobj.close()
+                except Exception:
+                    pass
 
     def bot_get_file_path(self, file_id: str):
+        cached = self._file_path_cache.get(file_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
         self._guard()
-        r = requests.get(f"{self.bot_base}/getFile", params={"file_id": file_id}, timeout=60)
+        r = self._control.get(self._url_getfile, params={"file_id": file_id}, timeout=60)
         if r.status_code != 200:
             return None
         data = r.json()
         if data.get("ok") and data.get("result", {}).get("file_path"):
-            return data["result"]["file_path"]
+            fp = data["result"]["file_path"]
+            self._file_path_cache[file_id] = (fp, time.monotonic() + FILE_PATH_TTL)
+            return fp
         return None
 
-    def bot_download_file(self, file_id: str, dest: Path, progress_cb=None) -> bool:
+    def bot_download_file(self, file_id: str, dest: Path, progress_cb=None,
+                          cancel: Optional[threading.Event] = None) -> bool:
         """
         Stream a file via the Bot API with progress updates.
+        Setting `cancel` aborts the transfer (returns False).
         """
         fp = self.bot_get_file_path(file_id)
         if not fp:
@@ -181,37 +366,58 @@ class DualTelegramClient:
         url = f"{self.bot_file_base}/{fp}"
         self._guard()
 
-        start = time.time()
         bytes_read = 0
-        last_ts = start
-        last_bytes = 0
+        meter = _SpeedMeter()
 
-        with requests.get(url, stream=True, timeout=1800) as r:
+        with self._session.get(url, stream=True, timeout=1800) as r:
             if r.status_code != 200:
+                self._file_path_cache.pop(file_id, None)  # path may have expired early
                 return False
             total = int(r.headers.get("Content-Length", "0") or 0)
 
             # ensure folder exists
             dest.parent.mkdir(parents=True, exist_ok=True)
 
+            # Read the urllib3 stream directly in big blocks (no iter_content generator per 128 KB)
+            r.raw.decode_content = True
             with open(dest, "wb") as out:
-                for chunk in r.iter_content(chunk_size=1024 * 128):
-                    if not chunk:
-                        continue
-                    out.write(chunk)
-                    bytes_read += len(chunk)
-
-                    # progress update ~1/sec
-                    if progress_cb:
-                        now = time.time()
-                        if now - last_ts >= 1.0 or bytes_read == total:
-                            elapsed = max(now - last_ts, 1e-6)
-                            speed = (bytes_read - last_bytes) / elapsed
-                            remain = max(total - bytes_read, 0)
-                            eta = (remain / speed) if speed > 0 else 0
-                            last_ts = now
-                            last_bytes = bytes_read
-                            progress_cb(bytes_read, total, speed, eta)
+                # Reserve the whole file up front so it is laid out in few extents
+                if total > 0 and hasattr(os, "posix_fallocate"):
+                    try:
+                        os.posix_fallocate(out.fileno(), 0, total)
+                    except OSError:
+                        pass
+
+                if not progress_cb and cancel is None:
+                    shutil.copyfileobj(r.raw, out, DOWNLOAD_READ_SIZE)
+                    bytes_read = out.tell()
+                else:
+                    while True:
+                        if cancel is not None and cancel.is_set():
+                            return False
+                        chunk = r.raw.read(DOWNLOAD_READ_SIZE)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                        bytes_read += len(chunk)
+
+                        # progress update ~1/sec
+                        now = time.monotonic()
+                        if progress_cb and (now - meter.last_ts >= 1.0 or bytes_read == total):
+                            speed, eta = meter.update(bytes_read, total, now)
+                            self._progress.post(progress_cb, bytes_read, total, speed, eta)
+
+                # A short read must not leave preallocated zeros at the end
+                if total > 0 and bytes_read != total:
+                    out.truncate(bytes_read)
+
+                # Large restores shouldn't evict everything else from the page cache
+                if hasattr(os, "posix_fadvise"):
+                    try:
+                        out.flush()
+                        os.posix_fadvise(out.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+                    except OSError:
+                        pass
         return True
 
     # ------------- User helpers -------------
@@ -226,19 +432,19 @@ class DualTelegramClient:
             logging.warning("User client not initialized; cannot send via 2GB mode.")
             return None, None
 
-        start = time.time()
+        meter = _SpeedMeter()
 
         def _pyro_progress(current, total_):
             if progress_cb:
-                elapsed = max(time.time() - start, 1e-6)
-                speed = current / elapsed
-                remaining = max(total_ - current, 0)
-                eta = remaining / speed if speed > 0 else 0
-                progress_cb(current, total_, speed, eta)
+                now = time.monotonic()
+                if now - meter.last_ts < PROGRESS_INTERVAL and current < total_:
+                    return
+                speed, eta = meter.update(current, total_, now)
+                self._progress.post(progress_cb, current, total_, speed, eta)
 
         async def _do_send():
             m = await self.user_client.send_document(
-                chat_id=int(self.cfg.get("chat_id")),
+                chat_id=self.chat_id_int,
                 document=str(file_path),
                 caption=caption or "",
                 progress=_pyro_progress,
@@ -253,36 +459,32 @@ class DualTelegramClient:
             logging.exception("User send failed: %s", e)
             return None, None
 
-    def user_download_by_message_id(self, message_id: int, dest: Path, progress_cb=None) -> bool:
+    def user_download_by_message_id(self, message_id: int, dest: Path, progress_cb=None,
+                                    cancel: Optional[threading.Event] = None) -> bool:
         """
         Download via user API (Pyrogram) with progress updates.
+        Setting `cancel` aborts the transfer (returns False).
         """
         if not (self.user_loop and self.user_ready.is_set() and self.user_client):
             return False
 
-        start = time.time()
-        last = start
-        last_bytes = 0
+        meter = _SpeedMeter()
 
         # Pyrogram progress callback gets (current, total)
         def _pyro_progress(current, total):
-            nonlocal last, last_bytes
+            if cancel is not None and cancel.is_set():
+                self.user_client.stop_transmission()
             if not progress_cb:
                 return
-            now = time.time()
-            if now - last >= 1.0 or current == total:
-                elapsed = max(now - last, 1e-6)
-                speed = (current - last_bytes) / elapsed
-                remaining = max(total - current, 0)
-                eta = remaining / speed if speed > 0 else 0
-                last = now
-                last_bytes = current
-                progress_cb(current, total, speed, eta)
+            now = time.monotonic()
+            if now - meter.last_ts >= 1.0 or current == total:
+                speed, eta = meter.update(current, total, now)
+                self._progress.post(progress_cb, current, total, speed, eta)
 
         async def _dl():
-            m: "Message" = await self.user_client.get_messages(int(self.cfg.get("chat_id")), message_id)
-            await self.user_client.download_media(m, file_name=str(dest), progress=_pyro_progress)
-            return True
+            m: "Message" = await self.user_client.get_messages(self.chat_id_int, message_id)
+            # None when the transfer was stopped
+            return await self.user_client.download_media(m, file_name=str(dest), progress=_pyro_progress)
 
         try:
             return bool(self._await_on_user_loop(_dl(), timeout=None))
@@ -293,51 +495,137 @@ class DualTelegramClient:
             logging.exception("User download failed: %s", e)
             return False
 
-    def shutdown_user_client(self):
-        if self.user_loop and self.user_client:
+    def close(self):
+        for session in (self._session, self._control):
             try:
-                self._await_on_user_loop(self.user_client.stop(), timeout=10)
+                session.close()
             except Exception:
                 pass
+
+    def shutdown_user_client(self):
+        self.close()
+        if not self.user_loop:
+            return
+        if self.user_client and self.user_ready.is_set():
             try:
-                self.user_loop.call_soon_threadsafe(self.user_loop.stop)
+                self._await_on_user_loop(self.user_client.stop(), timeout=10)
             except Exception:
                 pass
+        self.user_ready.clear()
+        try:
+            self.user_loop.call_soon_threadsafe(self.user_loop.stop)
+        except Exception:
+            pass
+        if self._user_thread:
+            self._user_thread.join(timeout=5)
 
     # ------------- High-level wrappers -------------
-    def send_document(self, path: Path, caption: str, prefer_user: bool = False, progress_cb=None):
-        enable_2gb = bool(self.cfg.get("enable_2gb_mode", False))
-        if enable_2gb and (self.user_client is not None) and self.user_ready.is_set():
-            force_user = bool(self.cfg.get("force_user_api", True))
-            use_user = force_user or (path.stat().st_size > self.BOT_LIMIT) or prefer_user
+    def send_document(self, path: Path, caption: str, prefer_user: bool = False, progress_cb=None, fobj=None):
+        size = os.fstat(fobj.fileno()).st_size if fobj is not None else path.stat().st_size
+        if self._enable_2gb and (self.user_client is not None) and self.user_ready.is_set():
+            use_user = self._force_user or (size > self.BOT_LIMIT) or prefer_user
             if use_user:
                 mid, _ = self.user_send_document(path, caption, progress_cb)
                 return ("user", mid, None)
 
         # Bot path
-        if path.stat().st_size > self.BOT_LIMIT:
+        if size > self.BOT_LIMIT:
             logging.warning("File %s is >50MB but 2GB mode is OFF or user client not ready. Skipping.", path.name)
             return ("bot", None, None)
-        mid, fid = self.bot_send_document(path, caption, progress_cb)
+        mid, fid = self.bot_send_document(path, caption, progress_cb, total=size, fobj=fobj)
         return ("bot", mid, fid)
 
     def download(self, fm, dest: Path, progress_cb=None) -> bool:
         """
         High-level downloader that chooses bot or user path and emits progress.
         """
+        file_id = getattr(fm, "file_id", None) if fm.via != "user" else None
+        user_mid = getattr(fm, "user_message_id", None)
+        if not user_mid and self.user_client:
+            # Fallback: some records may have message_id only
+            user_mid = getattr(fm, "message_id", None)
+        user_ok = bool(user_mid and self.user_loop and self.user_ready.is_set() and self.user_client)
+
+        # Bot API can't serve files over 20 MB; don't spend a getFile round trip finding that out
+        if file_id and user_ok and (getattr(fm, "size", 0) or 0) > BOT_DOWNLOAD_LIMIT:
+            file_id = None
+
+        if file_id and user_ok:
+            return self._race_download(file_id, user_mid, dest, progress_cb)
+
         # Prefer bot if we have a bot file_id (unless it fails)
-        if fm.via != "user" and getattr(fm, "file_id", None):
-            ok = self.bot_download_file(fm.file_id, dest, progress_cb=progress_cb)
+        if file_id:
+            ok = self.bot_download_file(file_id, dest, progress_cb=progress_cb)
             if ok:
                 return True
 
-        # Try user download by message id
-        if getattr(fm, "user_message_id", None):
-            return self.user_download_by_message_id(fm.user_message_id, dest, progress_cb=progress_cb)
-
-        # Fallback: some records may have message_id only
-        if getattr(fm, "message_id", None) and self.user_client:
-            return self.user_download_by_message_id(fm.message_id, dest, progress_cb=progress_cb)
+        if user_mid:
+            return self.user_download_by_message_id(user_mid, dest, progress_cb=progress_cb)
 
         logging.warning("No valid download source (bot file_id or user message id) for item.")
         return False
+
+    def _race_download(self, file_id: str, message_id: int, dest: Path, progress_cb=None) -> bool:
+        """
+        Fetch through the Bot API and the user API at the same time into separate temp
+        files; keep whichever finishes first and cancel the other.
+        """
+        cancel = threading.Event()
+        finished: "queue.Queue[str]" = queue.Queue()
+        parts = {"bot": dest.with_name(dest.name + ".bot.part"),
+                 "user": dest.with_name(dest.name + ".user.part")}
+        lock = threading.Lock()  # guards best and winner; both legs run at once
+        best = 0
+        winner = None
+
+        def _progress(current, total, speed, eta):
+            # Both paths report; only let the one that is ahead move the bar
+            nonlocal best
+            with lock:
+                if current < best:
+                    return
+                best = current
+                progress_cb(current, total, speed, eta)
+
+        cb = _progress if progress_cb else None
+        runners = {
+            "bot": lambda: self.bot_download_file(file_id, parts["bot"], progress_cb=cb, cancel=cancel),
+            "user": lambda: self.user_download_by_message_id(message_id, parts["user"], progress_cb=cb, cancel=cancel),
+        }
+
+        def _run(name):
+            nonlocal winner
+            try:
+                ok = runners[name]()
+            except Exception as e:
+                logging.exception("%s download failed: %s", name, e)
+                ok = False
+            with lock:
+                if ok and winner is None:
+                    winner = name
+                    cancel.set()
+                won = winner == name
+            if not won:
+                # The losing/failed leg removes its own temp file once it has let go of it,
+                # so nothing depends on the caller outwaiting a slow cancel (Windows locks)
+                try:
+                    parts[name].unlink(missing_ok=True)
+                except OSError:
+                    pass
+            finished.put(name)
+
+        threads = [threading.Thread(target=_run, args=(n,), name=f"download-{n}", daemon=True) for n in runners]
+        for t in threads:
+            t.start()
+
+        for _ in threads:
+            finished.get()
+            with lock:
+                if winner is not None:
+                    break
+        cancel.set()
+
+        if winner:
+            os.replace(parts[winner], dest)
+            logging.info("Download won by %s path: %s", winner, dest.name)
+        return winner is not None
@@ -1,14 +1,20 @@
 import os
 import sys
 import math
+import stat
 import time
+import queue
+import shlex
 import shutil
+import importlib.util
 import platform
+import subprocess
 import logging
 import threading
 import datetime as dt
 from pathlib import Path
 from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
@@ -25,38 +31,100 @@ except Exception:
     TkinterDnD = tk.Tk
     TKDND_AVAILABLE = False
 
-# Optional notifications
-try:
-    from plyer import notification
-except Exception:
-    notification = None
+# Optional notifications; plyer is only imported on the first notify()
+NOTIFY_AVAILABLE = importlib.util.find_spec("plyer") is not None
+_notification = None
 
-# Watchdog to mirror extra folders
+# Watchdog to mirror extra folders. The event base class is light; the Observer
+# (platform backend) is imported when the first linked folder is watched.
 try:
-    from watchdog.observers import Observer
     from watchdog.events import FileSystemEventHandler
     WATCHDOG_AVAILABLE = True
 except Exception:
+    FileSystemEventHandler = object
     WATCHDOG_AVAILABLE = False
 
+
+def _get_notification():
+    global _notification, NOTIFY_AVAILABLE
+    if _notification is None and NOTIFY_AVAILABLE:
+        try:
+            from plyer import notification as _notification
+        except Exception:
+            NOTIFY_AVAILABLE = False
+    return _notification
+
 from ..paths import WORK_DIR, CLOUD_DIR, DOWNLOAD_DIR, BACKUP_DIR
-from ..utils import human_size
+from ..utils import human_size, hash_algo_for
+from ..config import save_config
 from ..core.backup import create_zip_backup
 
 
+LOG_MAX_LINES = 2000  # lines kept in the GUI log pane
+LOG_DRAIN_MS = 100
+ROWS_POLL_MS = 100  # Tk thread picks up rows built off-thread at this cadence
+PROGRESS_UI_MS = 50  # upload bar redraws at most ~20x per second
+PROGRESS_FILE_MIN_S = 0.1  # each file feeds the bar at most ~10x per second
+DOWNLOAD_ALL_MAX_WORKERS = 8  # parallel streams for "Download all" (num_workers, capped)
+ZIP_WAKE_EVENT = "<<ZipProgress>>"  # posted by the zip worker on each progress put
+ZIP_FALLBACK_POLL_MS = 1000
+_MMSS = tuple(f"{i//60:02d}:{i%60:02d}" for i in range(3600))  # ETA text for the sub-hour case
+
+
+def _human_size_fast(n: int) -> str:
+    """human_size for per-tick UI text. From 1 MiB up the 2-decimal display steps by
+    ~10 KiB, so values are rounded to whole KiB and hit human_size's cache."""
+    return human_size(((n + 512) >> 10) << 10) if n >= 1 << 20 else human_size(n)
+
+
 # ---------- Helpers ----------
+class _WakeQueue(queue.Queue):
+    """Queue whose put() pokes the Tk loop (at most one wake in flight until rearm())."""
+
+    def __init__(self):
+        super().__init__()
+        self.on_put = None
+        self._armed = threading.Event()
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        cb = self.on_put
+        if cb and not self._armed.is_set():
+            self._armed.set()
+            try:
+                cb()
+            except Exception:
+                pass  # window gone or Tcl not threaded; the fallback poll drains it
+
+    def rearm(self):
+        self._armed.clear()
+
+
 def open_os_folder(path: Path):
     try:
         if os.name == "nt":
             os.startfile(str(path))  # noqa: P204
         elif sys.platform == "darwin":
-            os.system(f"open '{path}'")
+            subprocess.Popen(["open", str(path)])
         else:
-            os.system(f"xdg-open '{path}'")
+            subprocess.Popen(["xdg-open", str(path)])
     except Exception as e:
         logging.exception("Open folder failed: %s", e)
 
 
+def _fast_copy(src: Path, dst: Path):
+    """
+    copy2 with the kernel doing the data copy: CopyFileW on Windows (which also carries
+    timestamps/attributes). Elsewhere shutil.copy2 already uses sendfile/fcopyfile and
+    falls back to a plain read/write loop when the filesystem refuses.
+    """
+    if os.name == "nt":
+        import ctypes
+        if ctypes.windll.kernel32.CopyFileW(str(src), str(dst), False):
+            return
+    shutil.copy2(src, dst)
+
+
 def sanitize_name(p: Path) -> str:
     s = p.name.strip().replace(":", "_").replace("/", "_").replace("\\", "_")
     return s or "linked"
@@ -67,36 +135,122 @@ class MirrorEventHandler(FileSystemEventHandler):
     Mirrors created/modified files from an extra folder into CLOUD_DIR/linked/<folder-name>/
     so your existing UploadPool (which watches CLOUD_DIR) will pick them up.
     """
+    QUIET_S = 0.5  # copy once a path has had no events for this long
+    COPY_WORKERS = 4  # a burst of ready files is copied in parallel
+
     def __init__(self, source_root: Path, dest_root: Path, gui_logger):
         super().__init__()
         self.source_root = source_root
         self.dest_root = dest_root
         self.gui_logger = gui_logger
+        # Per-event path math is plain string slicing; parent dirs are created once
+        self._src_prefix = str(source_root) + os.sep
+        self._dest_root_str = str(dest_root)
+        self._made_dirs: set = set()
+        # Editors fire bursts of modify events per save; coalesce them per path
+        self._pending: dict = {}  # src path (str) -> monotonic time of last event
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._copier = ThreadPoolExecutor(self.COPY_WORKERS, "mirror-copy")
+        threading.Thread(target=self._flush_loop, name="mirror-flush", daemon=True).start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(0.2):
+            cutoff = time.monotonic() - self.QUIET_S
+            with self._lock:
+                ready = [p for p, ts in self._pending.items() if ts <= cutoff]
+                for p in ready:
+                    del self._pending[p]
+            if len(ready) == 1:
+                self._mirror_file(ready[0])
+            elif ready:
+                # Sorted so each destination dir's files are adjacent; its mkdir runs once
+                # and the copies overlap their I/O on the worker threads.
+                ready.sort()
+                try:
+                    list(self._copier.map(self._mirror_file, ready))
+                except Exception:
+                    return  # copier shut down by stop()
 
-    def _mirror_file(self, src: Path):
+    def _schedule(self, src: str):
+        with self._lock:
+            self._pending[src] = time.monotonic()
+
+    def stop(self):
+        self._stop.set()
+        self._copier.shutdown(wait=False, cancel_futures=True)
+
+    def _mirror_file(self, src: str):
         try:
-            if not src.is_file():
+            if not src.startswith(self._src_prefix):
                 return
-            rel = src.relative_to(self.source_root)
-            dst = self.dest_root / rel
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src, dst)
+            try:
+                ss = os.stat(src)
+            except FileNotFoundError:
+                return
+            if not stat.S_ISREG(ss.st_mode):
+                return
+            rel = src[len(self._src_prefix):]
+            dst = os.path.join(self._dest_root_str, rel)
+            # copy2 keeps mtime, so same size + mtime means this version is already mirrored
+            try:
+                ds = os.stat(dst)
+                if ss.st_size == ds.st_size and int(ss.st_mtime) == int(ds.st_mtime):
+                    return
+            except FileNotFoundError:
+                pass
+            parent = os.path.dirname(dst)
+            if parent not in self._made_dirs:
+                with self._lock:
+                    if parent not in self._made_dirs:
+                        os.makedirs(parent, exist_ok=True)
+                        self._made_dirs.add(parent)
+            _fast_copy(src, dst)
             if self.gui_logger:
-                self.gui_logger(f"Mirrored: {rel} → {dst.relative_to(self.dest_root.parent)}")
+                self.gui_logger(f"Mirrored: {rel} → {os.path.join(self.dest_root.name, rel)}")
         except Exception as e:
+            self._made_dirs.clear()  # the mirror tree may have been removed; recreate next time
             logging.exception("Mirror copy failed: %s", e)
             if self.gui_logger:
-                self.gui_logger(f"Mirror copy failed: {src.name}: {e}")
+                self.gui_logger(f"Mirror copy failed: {os.path.basename(src)}: {e}")
 
     def on_created(self, event):
         if getattr(event, "is_directory", False):
             return
-        self._mirror_file(Path(event.src_path))
+        self._schedule(os.fsdecode(event.src_path))
 
     def on_modified(self, event):
         if getattr(event, "is_directory", False):
             return
-        self._mirror_file(Path(event.src_path))
+        self._schedule(os.fsdecode(event.src_path))
+
+    def on_moved(self, event):
+        """Rename the mirrored copy in place instead of copying the file again."""
+        src, dest = os.fsdecode(event.src_path), os.fsdecode(event.dest_path)
+        if not dest.startswith(self._src_prefix):
+            return  # moved out of the linked folder; the mirror keeps its last copy
+        if not src.startswith(self._src_prefix):
+            self._schedule(dest)  # moved in from elsewhere: a plain new file
+            return
+        with self._lock:
+            was_pending = self._pending.pop(src, None) is not None
+        old = os.path.join(self._dest_root_str, src[len(self._src_prefix):])
+        new = os.path.join(self._dest_root_str, dest[len(self._src_prefix):])
+        try:
+            os.makedirs(os.path.dirname(new), exist_ok=True)
+            os.replace(old, new)
+            if event.is_directory:
+                self._made_dirs.clear()  # cached parents under the old name are gone
+            if self.gui_logger:
+                self.gui_logger(f"Mirror renamed: {os.path.basename(old)} → {os.path.basename(new)}")
+        except FileNotFoundError:
+            # Never mirrored (or already moved with its parent folder); copy if needed
+            was_pending = not event.is_directory
+        except OSError as e:
+            logging.warning("Mirror rename failed (%s); copying instead", e)
+            was_pending = not event.is_directory
+        if was_pending:
+            self._schedule(dest)
 
 
 # ---------- Settings Dialog ----------
@@ -111,6 +265,8 @@ class SettingsDialog(tk.Toplevel):
         self.on_save_cb = on_save_cb
         self.restart_cb = restart_cb
         self.vars = {k: tk.StringVar(value=str(v)) for k, v in cfg.items()}
+        v = cfg.get("extra_sync_folders")
+        self._linked_arr: List[str] = list(v) if isinstance(v, list) else []
         self.pyrogram_available = pyrogram_available
 
         nb = ttk.Notebook(self)
@@ -137,8 +293,10 @@ class SettingsDialog(tk.Toplevel):
         self._entry(f2, "Num download workers", "download_workers", 3)
         self._entry(f2, "Daily backup time HH:MM", "daily_backup_time", 4)
         self._entry(f2, "Use SHA256 (true/false)", "use_sha256", 5)
-        self._entry(f2, "Force user API (true/false)", "force_user_api", 6)
-        self._entry(f2, "Enable 2GB mode (true/false)", "enable_2gb_mode", 7)
+        self._entry(f2, "Hash algorithm (sha256/blake2b/blake3)", "hash_algo", 6)
+        self._entry(f2, "Force user API (true/false)", "force_user_api", 7)
+        self._entry(f2, "Enable 2GB mode (true/false)", "enable_2gb_mode", 8)
+        self._entry(f2, "Fast sampled hash (true/false)", "fast_hash", 9)
 
         # System
         f3 = ttk.Frame(nb, padding=10)
@@ -178,21 +336,16 @@ class SettingsDialog(tk.Toplevel):
         parent.grid_columnconfigure(1, weight=1)
 
     def _get_linked_folders(self) -> List[str]:
-        v = self.cfg.get("extra_sync_folders") or []
-        if isinstance(v, list):
-            return v
-        return []
+        return self._linked_arr
 
     def _add_linked_folder(self):
         d = filedialog.askdirectory(title="Choose a folder to mirror into TGCloud")
         if not d:
             return
         d = os.path.abspath(d)
-        arr = self._get_linked_folders()
-        if d not in arr:
-            arr.append(d)
-            self.cfg["extra_sync_folders"] = arr
-            from ..config import save_config
+        if d not in self._linked_arr:
+            self._linked_arr.append(d)
+            self.cfg["extra_sync_folders"] = self._linked_arr
             save_config(self.cfg)
             self.linked_list.insert("end", d)
             messagebox.showinfo("Added", "Folder added. Files created/updated there will mirror into TGCloud/linked/ .")
@@ -203,21 +356,21 @@ class SettingsDialog(tk.Toplevel):
         sel = list(self.linked_list.curselection())
         if not sel:
             return
-        arr = self._get_linked_folders()
         for idx in reversed(sel):
             val = self.linked_list.get(idx)
             self.linked_list.delete(idx)
-            if val in arr:
-                arr.remove(val)
-        self.cfg["extra_sync_folders"] = arr
-        from ..config import save_config
+            if val in self._linked_arr:
+                self._linked_arr.remove(val)
+        self.cfg["extra_sync_folders"] = self._linked_arr
         save_config(self.cfg)
         messagebox.showinfo("Removed", "Selected folder(s) removed from linked list.")
 
     def _save(self):
         for k, var in self.vars.items():
             val = var.get()
-            if k in ("rate_limit_seconds",):
+            if k == "extra_sync_folders":
+                self.cfg[k] = self._linked_arr  # a list, not the entry's str()
+            elif k in ("rate_limit_seconds",):
                 try:
                     self.cfg[k] = float(val)
                 except Exception:
@@ -227,11 +380,10 @@ class SettingsDialog(tk.Toplevel):
                     self.cfg[k] = int(val)
                 except Exception:
                     pass
-            elif k in ("use_sha256", "encryption_enabled", "force_user_api", "enable_2gb_mode"):
+            elif k in ("use_sha256", "fast_hash", "encryption_enabled", "force_user_api", "enable_2gb_mode"):
                 self.cfg[k] = str(val).lower() in ("1","true","yes","on")
             else:
                 self.cfg[k] = val
-        from ..config import save_config
         save_config(self.cfg)
         self.on_save_cb(self.cfg)
         self.destroy()
@@ -296,7 +448,6 @@ class SettingsDialog(tk.Toplevel):
         self.cfg["api_id"] = api_id_int
         self.cfg["api_hash"] = api_hash
         self.cfg["user_session_string"] = s
-        from ..config import save_config
         save_config(self.cfg)
         messagebox.showinfo("Done", "Session string saved. Turn ON 2GB mode and Restart to activate 2GB uploads.")
 
@@ -330,11 +481,37 @@ class TGCloudGUI:
         self.progress_eta_var = tk.StringVar(value="—")
         self.status_var = tk.StringVar(value="Ready")
 
+        # Background jobs started from the UI (auto-zip, ...); reused threads, bounded concurrency
+        self._bg = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tgcloud-bg")
+        # File-list rebuilds get their own thread so a long zip/copy job never delays them
+        self._rows_exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tgcloud-rows")
+
+        self._refresh_pending = False
+        self._refresh_lock = threading.Lock()
+        self._row_cache: dict = {}  # table iid (rel) -> per-column sort key
+        self._row_values: dict = {}  # table iid (rel) -> displayed values
+        # Built rows come back through a queue the Tk thread polls: root.after() from another
+        # thread fails until mainloop runs, and App does network calls before starting it
+        self._rows_q: "queue.Queue[list]" = queue.Queue()
+
+        # Latest upload progress tick, applied by _flush_progress on the Tk thread
+        self._pending_progress: Optional[tuple] = None
+        self._progress_scheduled = False
+        self._progress_lock = threading.Lock()
+        self._last_ui_update: dict = {}  # rel -> monotonic time of its last accepted tick
+
+        # Log lines from any thread; drained onto the Text widget in batches
+        self._log_q: "queue.Queue[tuple]" = queue.Queue()
+
         # Extra folder observers
-        self._linked_observers: List[Observer] = []
+        # One Observer for every linked folder; each folder is a scheduled watch on it
+        self._linked_observer = None  # watchdog Observer, created on first linked folder
+        self._linked_watches: List[tuple] = []  # (ObservedWatch, MirrorEventHandler)
 
         self._build_ui()
         self._load_linked_folder_watchers()
+        self.root.after(LOG_DRAIN_MS, self._drain_log)
+        self.root.after(ROWS_POLL_MS, self._drain_rows)
 
     def attach_pool(self, pool):
         self.pool = pool
@@ -446,12 +623,6 @@ class TGCloudGUI:
 
     def on_auto_zip_folder(self):
         """Automatically zip large folders into ≤2GB chunks and show real-time popup safely."""
-        from tkinter import filedialog
-        from queue import Queue
-        from pathlib import Path
-        from ..core.folder_packer import auto_zip_folder
-        from ..paths import BACKUP_DIR
-
         folder = filedialog.askdirectory(title="Select Folder to Auto-ZIP (≤2GB each)")
         if not folder:
             return
@@ -460,8 +631,8 @@ class TGCloudGUI:
         self.log(f"🗜 Starting Auto ZIP for folder: {folder}")
         self.set_current_upload("Zipping...", 0)
 
-        # Queue for progress updates
-        progress_q = Queue()
+        # Queue for progress updates; each put wakes the popup instead of it polling
+        progress_q = _WakeQueue()
 
         # 🪟 Create the popup window safely in main thread
         popup = self._show_zip_progress_window(folder.name, BACKUP_DIR / "zip_files", progress_q)
@@ -479,7 +650,7 @@ class TGCloudGUI:
                 self.log(f"❌ Auto ZIP failed: {e}")
                 progress_q.put("DONE")
 
-        threading.Thread(target=_run, daemon=True).start()
+        popup.future = self._bg.submit(_run)
 
 
 
@@ -496,7 +667,7 @@ class TGCloudGUI:
         ttk.Label(win, text="Output Folder:").pack()
         link = ttk.Label(win, text=str(out_dir), foreground="#0078D7", cursor="hand2")
         link.pack()
-        link.bind("<Button-1>", lambda e: os.startfile(str(out_dir)))
+        link.bind("<Button-1>", lambda e: open_os_folder(out_dir))
 
         pb = ttk.Progressbar(win, length=440, mode="determinate")
         pb.pack(pady=(14,4))
@@ -505,30 +676,63 @@ class TGCloudGUI:
 
         lbl_time = ttk.Label(win, text="Elapsed: 0s | ETA: —", font=("Segoe UI", 9), foreground="#666")
         lbl_time.pack(pady=(0,10))
-        close_btn = ttk.Button(win, text="Close", command=win.destroy, state="disabled")
+        def _close():
+            fut = getattr(win, "future", None)
+            if fut:
+                fut.cancel()  # only effective if the job hasn't started yet
+            win.destroy()
+
+        close_btn = ttk.Button(win, text="Close", command=_close, state="disabled")
         close_btn.pack(side="bottom", pady=(8,6))
 
-        def update_loop():
-            try:
-                msg = progress_q.get_nowait()
+        def drain() -> bool:
+            # Drain everything queued since the last wake; only the newest progress is drawn
+            if hasattr(progress_q, "rearm"):
+                progress_q.rearm()
+            latest, done = None, False
+            while True:
+                try:
+                    msg = progress_q.get_nowait()
+                except queue.Empty:
+                    break
                 if msg == "DONE":
-                    lbl_status.config(text="✅ ZIP Completed!")
-                    pb["value"] = 100
-                    close_btn.config(state="normal")
-                    return
+                    done = True
+                    break
                 if isinstance(msg, dict) and msg.get("type") == "progress":
-                    pb["value"] = msg["pct"]
+                    latest = msg
+            try:
+                if latest:
+                    pb["value"] = latest["pct"]
                     lbl_status.config(
-                        text=f"Creating {msg['current_zip']} ({msg['completed_zips']}/{msg['total_zips']}) - {msg['pct']:.1f}%"
+                        text=f"Creating {latest['current_zip']} ({latest['completed_zips']}/{latest['total_zips']}) - {latest['pct']:.1f}%"
                     )
                     lbl_time.config(
-                        text=f"Elapsed: {int(msg['elapsed'])}s | ETA: {int(msg['eta'])}s"
+                        text=f"Elapsed: {int(latest['elapsed'])}s | ETA: {int(latest['eta'])}s"
                     )
-            except:
-                pass
-            win.after(300, update_loop)
-
-        update_loop()
+                if done:
+                    lbl_status.config(text="✅ ZIP Completed!")
+                    pb["value"] = 100
+                    close_btn.config(state="normal")
+            except tk.TclError:
+                return True  # popup closed
+            return done
+
+        finished = []
+
+        def on_wake(_event=None):
+            if not finished and drain():
+                finished.append(True)
+
+        def fallback_poll():
+            # Safety net for Tcl builds where event_generate from a worker thread fails
+            on_wake()
+            if not finished:
+                win.after(ZIP_FALLBACK_POLL_MS, fallback_poll)
+
+        win.bind(ZIP_WAKE_EVENT, on_wake)
+        if hasattr(progress_q, "on_put"):
+            progress_q.on_put = lambda: win.event_generate(ZIP_WAKE_EVENT, when="tail")
+        fallback_poll()
         return win
 
 
@@ -536,14 +740,14 @@ class TGCloudGUI:
     def _load_linked_folder_watchers(self):
         if not WATCHDOG_AVAILABLE:
             return
-        # Stop old
-        for obs in self._linked_observers:
+        # Drop old watches; the observer thread itself is kept
+        for watch, handler in self._linked_watches:
             try:
-                obs.stop()
-                obs.join(timeout=1)
+                self._linked_observer.unschedule(watch)
             except Exception:
                 pass
-        self._linked_observers.clear()
+            handler.stop()
+        self._linked_watches.clear()
 
         folders = self.cfg.get("extra_sync_folders") or []
         if not folders:
@@ -552,6 +756,12 @@ class TGCloudGUI:
         mirror_root = (CLOUD_DIR / "linked")
         mirror_root.mkdir(parents=True, exist_ok=True)
 
+        if self._linked_observer is None:
+            from watchdog.observers import Observer
+            self._linked_observer = Observer()
+            self._linked_observer.daemon = True
+            self._linked_observer.start()
+
         for folder in folders:
             src = Path(folder)
             if not src.exists() or not src.is_dir():
@@ -559,31 +769,46 @@ class TGCloudGUI:
             dest = mirror_root / sanitize_name(src)
             dest.mkdir(parents=True, exist_ok=True)
             handler = MirrorEventHandler(src, dest, self.log)
-            obs = Observer()
-            obs.schedule(handler, str(src), recursive=True)
-            obs.daemon = True
-            obs.start()
-            self._linked_observers.append(obs)
+            watch = self._linked_observer.schedule(handler, str(src), recursive=True)
+            self._linked_watches.append((watch, handler))
             self.log(f"Linked watcher: {src} → {dest}")
 
     # ---------- actions ----------
     def open_settings(self):
         def on_save(new_cfg):
             self.cfg.update(new_cfg)
-            self.tg.rate_limit = float(new_cfg.get("rate_limit_seconds", 0.5))
+            self.tg.apply_settings(self.cfg)
             self.log("Settings saved. Some changes require restart.")
             # reload watchers in case linked folders changed
             self._load_linked_folder_watchers()
 
         SettingsDialog(self.root, self.cfg, on_save, self.restart_app, self.pyrogram_available)
 
+    def shutdown(self):
+        """Called on app exit: stop linked-folder mirrors and drop queued background jobs."""
+        if self._linked_observer is not None:
+            try:
+                self._linked_observer.stop()
+            except Exception:
+                pass
+        for _, handler in self._linked_watches:
+            handler.stop()
+        self._bg.shutdown(wait=False, cancel_futures=True)
+        self._rows_exec.shutdown(wait=False, cancel_futures=True)
+
     def restart_app(self):
         launcher = self.cfg.get("preferred_python") or "py -3.11"
-        cmd = f'{launcher} "{(WORK_DIR / "run.py")}"'
-        self.log(f"Restarting with: {cmd}")
+        # Argument list, no shell: nothing to re-tokenize, quotes in paths are harmless.
+        # Non-POSIX split keeps Windows backslashes; it leaves quotes on, so strip them.
+        posix = os.name != "nt"
+        args = [a if posix else a.strip('"') for a in shlex.split(launcher, posix=posix)]
+        args.append(str(WORK_DIR / "run.py"))
+        self.log(f"Restarting with: {subprocess.list2cmdline(args)}")
         try:
-            subprocess = __import__("subprocess")
-            subprocess.Popen(cmd, shell=True, cwd=str(WORK_DIR))
+            if posix:
+                subprocess.Popen(args, cwd=str(WORK_DIR), close_fds=True)
+            else:
+                subprocess.Popen(args, cwd=str(WORK_DIR), creationflags=subprocess.DETACHED_PROCESS)
         except Exception as e:
             messagebox.showerror("Restart failed", str(e))
             return
@@ -601,6 +826,10 @@ class TGCloudGUI:
         self.open_settings()
 
     def _copy_into_cloud(self, src: Path):
+        # Multi-GB copies must not freeze the window; run on the background pool
+        self._bg.submit(self._copy_into_cloud_bg, src)
+
+    def _copy_into_cloud_bg(self, src: Path):
         try:
             CLOUD_DIR.mkdir(parents=True, exist_ok=True)
             dst = CLOUD_DIR / src.name
@@ -608,7 +837,7 @@ class TGCloudGUI:
             if dst.exists():
                 ts = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
                 dst = CLOUD_DIR / f"{src.stem}_{ts}{src.suffix}"
-            shutil.copy2(src, dst)
+            _fast_copy(src, dst)
             self.log(f"Queued upload: {dst.name}")
             if self.pool:
                 # Not strictly needed (watcher will catch), but enqueuing is snappier
@@ -618,7 +847,7 @@ class TGCloudGUI:
                     pass
         except Exception as e:
             logging.exception("Copy into cloud failed: %s", e)
-            messagebox.showerror("Copy failed", str(e))
+            self.root.after(0, messagebox.showerror, "Copy failed", f"{src.name}: {e}")
 
     # ---------- table helpers ----------
     def _popup_menu(self, event):
@@ -653,34 +882,42 @@ class TGCloudGUI:
             return
         if messagebox.askyesno("Remove", f"Remove {rel} from the list (local metadata only)?"):
             if rel in self.meta.files:
-                del self.meta.files[rel]
-                # saving metadata
-                from ..paths import METADATA_FILE
-                self.meta.save(METADATA_FILE)
+                self.meta.remove(rel)
                 self.refresh_table()
                 self.log(f"Removed {rel} from metadata.")
 
     def _sort_by(self, col):
-        items = [(self.table.set(k, col), k) for k in self.table.get_children("")]
-        # try numeric for size, else lexicographic
-        try:
-            items.sort(key=lambda t: float(t[0].split()[0]) if col == "size" else t[0].lower())
-        except Exception:
-            items.sort(key=lambda t: t[0].lower())
-        for index, (_, k) in enumerate(items):
-            self.table.move(k, "", index)
+        # Sort keys were computed with the rows, so no per-cell Tk reads or string parsing here
+        idx = list(self.table["columns"]).index(col)
+        cache = self._row_cache
+        self.table.set_children("", *sorted(cache, key=lambda k: cache[k][idx]))  # one Tcl call
 
     # ---------- logging & progress ----------
     def log(self, msg: str):
+        # Safe from worker threads: only the Tk thread touches the widget (see _drain_log)
         logging.info(msg)
+        self._log_q.put((dt.datetime.now().strftime('%H:%M:%S'), msg))
+
+    def _drain_log(self):
+        batch = []
         try:
-            self.log_text.insert("end", f"{dt.datetime.now().strftime('%H:%M:%S')}  {msg}\n")
-            self.log_text.see("end")
-        except Exception:
+            while len(batch) < 500:
+                batch.append(self._log_q.get_nowait())
+        except queue.Empty:
             pass
-        self.status_var.set(msg)
+        if batch:
+            try:
+                self.log_text.insert("end", "".join(f"{ts}  {msg}\n" for ts, msg in batch))
+                # Keep the widget bounded for long sessions
+                self.log_text.delete("1.0", f"end - {LOG_MAX_LINES} lines")
+                self.log_text.see("end")
+                self.status_var.set(batch[-1][1])
+            except tk.TclError:
+                return  # window destroyed
+        self.root.after(LOG_DRAIN_MS, self._drain_log)
 
     def notify(self, text: str):
+        notification = _get_notification()
         if notification:
             try:
                 notification.notify(title="TGCloud", message=text, app_name="TGCloud", timeout=3)
@@ -696,7 +933,9 @@ class TGCloudGUI:
             self.pause_btn.config(text="Pause")
 
     def set_current_upload(self, rel: str, size: int):
-        self.current_file_var.set(f"{rel} ({human_size(size)})")
+        with self._progress_lock:
+            self._pending_progress = None  # drop ticks left over from the previous file
+        self.current_file_var.set(f"{rel} ({_human_size_fast(size)})")
         self.pb["value"] = 0
         self.progress_pct_var.set("0%")
         self.progress_speed_var.set("0 KB/s")
@@ -711,20 +950,104 @@ class TGCloudGUI:
         self.progress_eta_var.set("—")
 
     def update_progress(self, rel: str, pct: int, speed_bps: float, eta_secs: float):
-        self.root.after(0, self._update_progress_ui, pct, speed_bps, eta_secs)
+        # Per-file cap first (several transfers, or both legs of a raced download, report
+        # at once); the final 100% tick always passes
+        now = time.monotonic()
+        if pct < 100:
+            if now - self._last_ui_update.get(rel, 0.0) < PROGRESS_FILE_MIN_S:
+                return
+            self._last_ui_update[rel] = now
+        else:
+            self._last_ui_update.pop(rel, None)
+        # Keep only the newest tick; at most one redraw is queued per PROGRESS_UI_MS
+        with self._progress_lock:
+            self._pending_progress = (pct, speed_bps, eta_secs)
+            if self._progress_scheduled:
+                return
+            self._progress_scheduled = True
+        self.root.after(PROGRESS_UI_MS, self._flush_progress)
+
+    def _flush_progress(self):
+        with self._progress_lock:
+            pending, self._pending_progress = self._pending_progress, None
+            self._progress_scheduled = False
+        if pending:
+            self._update_progress_ui(*pending)
 
     def _update_progress_ui(self, pct: int, speed_bps: float, eta_secs: float):
         self.pb["value"] = max(0, min(100, pct))
         self.progress_pct_var.set(f"{self.pb['value']:.0f}%")
-        self.progress_speed_var.set(f"{human_size(int(speed_bps))}/s")
-        self.progress_eta_var.set("—" if (eta_secs <= 0 or math.isinf(eta_secs) or math.isnan(eta_secs)) else f"{int(eta_secs)//60:02d}:{int(eta_secs)%60:02d}")
+        self.progress_speed_var.set(f"{_human_size_fast(int(speed_bps))}/s")
+        if eta_secs <= 0 or math.isinf(eta_secs) or math.isnan(eta_secs):
+            self.progress_eta_var.set("—")
+        else:
+            e = int(eta_secs)
+            self.progress_eta_var.set(_MMSS[e] if e < 3600 else f"{e//60:02d}:{e%60:02d}")
 
     def refresh_table(self):
-        for i in self.table.get_children():
-            self.table.delete(i)
-        items = sorted(self.meta.files.items(), key=lambda kv: kv[0].lower())
-        for rel, fm in items:
-            self.table.insert("", "end", values=(rel, human_size(fm.size), fm.status, fm.via or "-"))
+        """Rebuild the file list. Safe from any thread; bursts collapse into one rebuild."""
+        with self._refresh_lock:
+            if self._refresh_pending:
+                return
+            self._refresh_pending = True
+        self._rows_exec.submit(self._compute_rows).add_done_callback(self._report_rows_failure)
+
+    @staticmethod
+    def _report_rows_failure(fut):
+        if not fut.cancelled() and fut.exception() is not None:
+            logging.error("File list rebuild failed", exc_info=fut.exception())
+
+    def _compute_rows(self):
+        # Runs on the row-builder thread: sort + format without touching Tk
+        with self._refresh_lock:
+            self._refresh_pending = False  # later changes schedule a fresh rebuild
+        items = sorted(list(self.meta.files.items()), key=lambda kv: kv[0].lower())
+        # (display values, sort key per column) — sizes sort by bytes, not by the "12.3 MB" text
+        rows = [((rel, human_size(fm.size), fm.status, fm.via or "-"),
+                 (rel.lower(), fm.size or 0, fm.status.lower(), (fm.via or "-").lower()))
+                for rel, fm in items]
+        self._rows_q.put(rows)
+
+    def _drain_rows(self):
+        rows = None
+        try:
+            while True:
+                rows = self._rows_q.get_nowait()  # only the newest rebuild matters
+        except queue.Empty:
+            pass
+        if rows is not None:
+            try:
+                self._apply_rows(rows)
+            except tk.TclError:
+                return  # window destroyed
+            except Exception:
+                logging.exception("Applying file list rows failed")
+        self.root.after(ROWS_POLL_MS, self._drain_rows)
+
+    def _apply_rows(self, rows):
+        # Rows are keyed by rel (used as the Treeview iid), so a refresh only touches rows
+        # that appeared, vanished or changed; calls go straight to Tcl without option parsing.
+        table, call, w = self.table, self.table.tk.call, self.table._w
+        old = self._row_values
+        new = {values[0]: values for values, _ in rows}
+        table.configure(displaycolumns=())  # suspend column layout while rows change
+        try:
+            gone = [rel for rel in old if rel not in new]
+            if gone:
+                table.delete(*gone)
+            for rel, values in new.items():
+                prev = old.get(rel)
+                if prev is None:
+                    call(w, "insert", "", "end", "-id", rel, "-values", values)
+                elif prev != values:
+                    call(w, "item", rel, "-values", values)
+            order = tuple(new)  # rows arrive sorted by rel
+            if table.get_children() != order:
+                table.set_children("", *order)
+            self._row_values = new
+            self._row_cache = {values[0]: key for values, key in rows}
+        finally:
+            table.configure(displaycolumns="#all")
 
         # ---------- downloads ----------
     def on_download_selected(self):
@@ -769,7 +1092,7 @@ class TGCloudGUI:
         self.log(f"Saved to {dest}")
         self.notify(f"Downloaded {dest.name}")
     def on_download_all(self):
-        """Sequentially download all uploaded files (1 by 1) with live progress."""
+        """Download all uploaded files with a few parallel streams and live progress."""
         uploaded_items = [(rel, fm) for rel, fm in self.meta.files.items() if fm.status == "uploaded"]
         if not uploaded_items:
             messagebox.showinfo("Nothing to download", "No uploaded files found in metadata.")
@@ -781,30 +1104,49 @@ class TGCloudGUI:
 
         total_files = len(uploaded_items)
         total_bytes = sum(fm.size for _, fm in uploaded_items)
-        self.log(f"Sequential download: {total_files} files ({human_size(total_bytes)}) → {dest_dir.name}")
+        try:
+            workers = max(1, min(DOWNLOAD_ALL_MAX_WORKERS, int(self.cfg.get("num_workers", 3))))
+        except (TypeError, ValueError):
+            workers = 1
+        self.log(f"Download all: {total_files} files ({human_size(total_bytes)}) → {dest_dir.name}, {workers} at a time")
+
+        # Files restore flat into dest_dir, so same-named files share one task and run in
+        # order (the last one wins, as before) instead of racing on the same dest path.
+        groups = {}
+        for idx, (rel, fm) in enumerate(uploaded_items, start=1):
+            groups.setdefault(Path(rel).name, []).append((idx, rel, fm))
 
         done = {"ok": 0, "fail": 0, "bytes": 0}
+        done_lock = threading.Lock()
         start = time.time()
 
-        def _worker():
-            for idx, (rel, fm) in enumerate(uploaded_items, start=1):
+        def _download_group(items):
+            for idx, rel, fm in items:
                 dest = dest_dir / Path(rel).name
                 self.log(f"[{idx}/{total_files}] Downloading {rel} → {dest.name}")
 
-                def _progress(current, total, speed, eta):
+                def _progress(current, total, speed, eta, rel=rel):
                     pct = int(current * 100 / total) if total else 0
                     self.update_progress(rel, pct, speed, eta)
 
                 ok = self.tg.download(fm, dest, progress_cb=_progress)
-                if ok:
-                    done["ok"] += 1
-                    done["bytes"] += fm.size
-                    self.log(f"✓ {rel} ({human_size(fm.size)})")
-                else:
-                    done["fail"] += 1
-                    self.log(f"✗ {rel} (download failed)")
+                with done_lock:
+                    if ok:
+                        done["ok"] += 1
+                        done["bytes"] += fm.size
+                    else:
+                        done["fail"] += 1
+                self.log(f"✓ {rel} ({human_size(fm.size)})" if ok else f"✗ {rel} (download failed)")
                 self.done_current_upload()
 
+        def _worker():
+            with ThreadPoolExecutor(workers, "download-all") as ex:
+                for fut in as_completed([ex.submit(_download_group, g) for g in groups.values()]):
+                    try:
+                        fut.result()
+                    except Exception as e:
+                        logging.exception("Download worker failed: %s", e)
+
             elapsed = time.time() - start
             mbps = (done["bytes"] / 1024 / 1024) / elapsed if elapsed > 0 else 0
             msg = (f"Downloaded {done['ok']}/{total_files} files "
@@ -829,20 +1171,22 @@ class TGCloudGUI:
     def on_backup_now(self):
         """Create a ZIP backup of metadata and enqueue it for upload."""
         try:
-            from ..core.backup import create_zip_backup
-            zip_path = create_zip_backup(self.meta, refresh_table_cb=self.refresh_table)
+            zip_path = create_zip_backup(self.meta, refresh_table_cb=self.refresh_table,
+                                         hash_algo=hash_algo_for(self.cfg), pool=self.pool)
             if not zip_path:
                 self.log("Backup creation skipped or failed.")
                 return
             self.log(f"Backup created: {zip_path.name}")
             if self.pool:
-                self.pool.enqueue(zip_path)
-                self.log(f"Backup {zip_path.name} enqueued for upload.")
+                # enqueue blocks while the upload queue is full (e.g. during the initial scan)
+                def _enqueue():
+                    self.pool.enqueue(zip_path)
+                    self.log(f"Backup {zip_path.name} enqueued for upload.")
+                self._bg.submit(_enqueue)
         except Exception as e:
             self.log(f"Backup error: {e}")
             import traceback
             traceback.print_exc()
-            from tkinter import messagebox
             messagebox.showerror("Backup error", str(e))
 
     # ---------- end of class ----------
@@ -1,8 +1,21 @@
-import time, hashlib
+import os, time, hashlib, threading, functools
+from collections import OrderedDict
 from pathlib import Path
 
+# Optional SIMD tree hash (pip install blake3); selected with cfg["hash_algo"] = "blake3".
+# cfg["hash_algo"] = "blake2b" uses hashlib's BLAKE2b-256 (no extra package).
+try:
+    from blake3 import blake3 as _blake3
+except ImportError:
+    _blake3 = None
+
 IGNORED_SUFFIXES = {".tmp", ".crdownload", ".part", ".partial"}
+# For name.endswith(...): one C-level pass, no suffix/lower() temporaries
+IGNORED_SUFFIXES_TUPLE = tuple(sorted(IGNORED_SUFFIXES))
+
+HASH_READ_SIZE = 8 * 1024 * 1024  # read size for the pre-3.11 hash loop
 
+@functools.lru_cache(maxsize=4096)
 def human_size(num_bytes: int) -> str:
     units = ["B", "KB", "MB", "GB", "TB"]
     size = float(num_bytes)
@@ -12,21 +25,143 @@ def human_size(num_bytes: int) -> str:
         size /= 1024.0
     return f"{size:.2f} PB"
 
-def sha256_of(path: Path) -> str:
-    h = hashlib.sha256()
+def _blake2b_256():
+    return hashlib.blake2b(digest_size=32)
+
+def _hash_ctor(algo: str):
+    if algo == "blake3" and _blake3 is not None:
+        return _blake3
+    if algo == "blake2b":
+        return _blake2b_256  # faster than SHA-256 on CPUs without SHA extensions
+    return hashlib.sha256
+
+def new_hash(algo: str = "sha256"):
+    """Fresh hash object for `algo` (same choice digest_of makes)."""
+    return _hash_ctor(algo)()
+
+def hash_algo_for(cfg: dict) -> str | None:
+    """Configured per-file digest algorithm (see file_hash_algo), or None when hashing is off."""
+    return file_hash_algo(cfg) if cfg.get("use_sha256") else None
+
+def digest_of(path: Path, algo: str = "sha256") -> str:
+    """Hex content digest of a file with the configured algorithm (change detection only).
+    Hashing runs in C via hashlib.file_digest (Py 3.11+)."""
     with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
+        return digest_fileobj(f, algo)
+
+def digest_fileobj(f, algo: str = "sha256") -> str:
+    """digest_of for an already open binary file, read from its current position."""
+    if algo == SAMPLED:
+        return _sampled_digest(f)
+    if hasattr(hashlib, "file_digest"):
+        return hashlib.file_digest(f, _hash_ctor(algo)).hexdigest()
+    # Older Pythons: one reused buffer, no bytes object per chunk
+    h = _hash_ctor(algo)()
+    mv = memoryview(bytearray(HASH_READ_SIZE))
+    while n := f.readinto(mv):
+        h.update(mv[:n])
+    return h.hexdigest()
+
+def open_sequential(path: Path):
+    """Open for a front-to-back read (hash, then upload) with a readahead hint where supported."""
+    f = open(path, "rb")
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+    return f
+
+sha256_of = digest_of  # older name; the digest is no longer always SHA-256
+
+SAMPLED = "sampled"  # file_hash_algo() value for quick_fingerprint
+SAMPLE_WINDOWS = 16
+SAMPLE_WINDOW = 64 * 1024
+
+def file_hash_algo(cfg: dict) -> str:
+    """Algorithm for per-file change digests; cfg["fast_hash"] swaps in quick_fingerprint."""
+    return SAMPLED if cfg.get("fast_hash") else cfg.get("hash_algo", "sha256")
+
+def quick_fingerprint(path: Path, windows: int = SAMPLE_WINDOWS, window: int = SAMPLE_WINDOW) -> str:
+    """
+    Coarse content fingerprint: BLAKE2b over the size and `windows` evenly spaced
+    `window`-byte slices (first and last included), so ~1 MiB is read whatever the
+    file size. An edit that keeps the size and misses every slice goes unnoticed,
+    which is why it is opt-in (cfg["fast_hash"]).
+    """
+    with open(path, "rb") as f:
+        return _sampled_digest(f, windows, window)
+
+def _sampled_digest(f, windows: int = SAMPLE_WINDOWS, window: int = SAMPLE_WINDOW) -> str:
+    h = hashlib.blake2b(digest_size=32)
+    size = os.fstat(f.fileno()).st_size
+    h.update(size.to_bytes(8, "little"))
+    if size <= windows * window:
+        h.update(f.read())
+    else:
+        step = (size - window) // (windows - 1)
+        for i in range(windows):
+            f.seek(i * step)
+            h.update(f.read(window))
     return h.hexdigest()
 
 def make_sig(size: int, mtime: float, sha: str | None = None) -> str:
-    return f"{size}:{int(mtime)}:{sha or ''}"
+    # Format is persisted in metadata; keep "size:mtime:" (trailing colon) for the no-hash case
+    if sha is None:
+        return f"{size}:{int(mtime)}:"
+    return f"{size}:{int(mtime)}:{sha}"
+
+def sig_matches_stat(sig: str | None, size: int, mtime: float) -> bool:
+    """rsync-style quick check: does `sig` record this size and mtime (hash part ignored)?"""
+    return bool(sig) and sig.startswith(make_sig(size, mtime))
+
+# Close-after-write notes from the folder watcher (watchdog on_closed = inotify IN_CLOSE_WRITE,
+# Linux only). A noted path was closed by its writer with no write since, so it is complete.
+_CLOSED_MAX = 4096
+SETTLED_AGE_S = 2.0  # files untouched this long are treated as fully written
+_closed: "OrderedDict[str, bool]" = OrderedDict()
+_closed_cv = threading.Condition()
+
+def note_file_written(path) -> None:
+    with _closed_cv:
+        _closed.pop(os.fspath(path), None)
+
+def note_file_closed(path) -> None:
+    key = os.fspath(path)
+    with _closed_cv:
+        _closed[key] = True
+        _closed.move_to_end(key)
+        while len(_closed) > _CLOSED_MAX:
+            _closed.popitem(last=False)
+        _closed_cv.notify_all()
 
 def wait_for_file_readable(path: Path, timeout: float = 120.0, check_interval: float = 0.5, stable_checks: int = 3) -> bool:
+    key = os.fspath(path)
+    # Not written for a while: almost always already closed, skip the stability window.
+    # ctime too, since copiers set an old mtime (copy2/CopyFile): POSIX bumps ctime on
+    # every write, and on Windows it is the creation time of the fresh copy.
+    try:
+        st = path.stat()
+        if st.st_size > 0 and time.time() - max(st.st_mtime, st.st_ctime) > SETTLED_AGE_S:
+            with open(path, "rb"): pass
+            with _closed_cv:
+                _closed.pop(key, None)
+            return True
+    except OSError:
+        pass
     deadline = time.time() + timeout
     last_size = None
     stable = 0
     while time.time() < deadline:
+        with _closed_cv:
+            closed = _closed.pop(key, False)
+        if closed:
+            # The writer closed it: one openability check instead of the stability window
+            try:
+                with open(path, "rb"): pass
+                return True
+            except OSError:
+                pass
         try:
             size = path.stat().st_size
             with open(path, "rb"): pass
@@ -39,5 +174,8 @@ def wait_for_file_readable(path: Path, timeout: float = 120.0, check_interval: f
                 return True
         except (PermissionError, FileNotFoundError, OSError):
             pass
-        time.sleep(check_interval)
+        # Sleep until the next check, or until the watcher reports the file closed
+        with _closed_cv:
+            if key not in _closed:
+                _closed_cv.wait(check_interval)
     return False
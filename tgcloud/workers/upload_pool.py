@@ -3,13 +3,13 @@ import threading
 import queue
 import datetime as dt
 import logging
-import hashlib
+from collections import OrderedDict
 from pathlib import Path
 
-from ..utils import sha256_of, make_sig, human_size, wait_for_file_readable, IGNORED_SUFFIXES
-from ..crypto import FERNET_AVAILABLE, derive_fernet_key
+from ..utils import digest_of, digest_fileobj, open_sequential, file_hash_algo, make_sig, sig_matches_stat, human_size, wait_for_file_readable, IGNORED_SUFFIXES_TUPLE
+from ..crypto import FERNET_AVAILABLE, file_key, encrypt_file
 from ..core.models import FileMeta
-from ..paths import METADATA_FILE, CLOUD_DIR
+from ..paths import CLOUD_DIR
 
 # Don't hard-import Fernet when cryptography may not be installed.
 try:
@@ -25,11 +25,25 @@ class UploadPool:
         self.meta = meta
         self.gui = None
 
-        self.q: "queue.Queue[Path]" = queue.Queue()
+        # Bounded so a 100k-file initial scan blocks the producer instead of
+        # piling every Path into memory at once.
+        # Stays a queue.Queue: N workers consume, and the bound is what pushes back on the scan.
+        # None is the stop sentinel.
+        self.q: "queue.Queue[Path | None]" = queue.Queue(maxsize=max(64, 8 * self._num_workers()))
         self.stop_event = threading.Event()
         self.paused = threading.Event()
-        self._last_event = {}
+        self._last_event: "OrderedDict[str, float]" = OrderedDict()  # rel -> last enqueue time, LRU-capped
+        self._last_event_lock = threading.Lock()  # enqueue runs on scan, watcher, GUI, bot and backup threads
+        # Paths currently sitting in self.q (O(1) duplicate check instead of scanning the queue)
+        self._queued: set = set()
+        self._queued_lock = threading.Lock()
+        # Paths that could not be queued right now (locked file, full queue); _retry_loop requeues them
+        self._retry: set = set()
+        self._retry_lock = threading.Lock()
         self.threads = []
+        # (size, mtime_ns, inode, algo) -> hex digest; _unchanged and _process hash each version once
+        self._hash_cache: dict = {}
+        self._hash_lock = threading.Lock()
 
     # -------- logging helper (console/app.log + GUI log pane) --------
     def _log(self, msg: str):
@@ -44,13 +58,16 @@ class UploadPool:
         self.gui = gui
 
     # -------- lifecycle --------
-    def start(self):
+    def _num_workers(self) -> int:
         # Ensure at least 1 worker, even if config is bad
         try:
             n = int(self.cfg.get("num_workers", 3))
         except Exception:
             n = 3
-        n = max(1, n)
+        return max(1, n)
+
+    def start(self):
+        n = self._num_workers()
 
         self._log(f"Starting {n} uploader worker thread(s)…")
         for i in range(n):
@@ -58,6 +75,16 @@ class UploadPool:
             self.threads.append(t)
             t.start()
             self._log(f"Started upload worker thread: {t.name}")
+        threading.Thread(target=self._retry_loop, name="uploader-retry", daemon=True).start()
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the workers and write out any metadata they have not persisted yet."""
+        self.stop_event.set()
+        self._wake_one()
+        deadline = time.monotonic() + timeout
+        for t in self.threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        self.meta.flush()
 
     def pause(self):
         self.paused.set()
@@ -72,10 +99,13 @@ class UploadPool:
         self._log("Upload resumed.")
 
     # -------- enqueue from watcher/scan --------
-    def enqueue(self, path: Path):
+    LAST_EVENT_MAX = 4096
+
+    def enqueue(self, path: Path, block: bool = True):
         if not path.exists():
             return
-        if path.suffix.lower() in IGNORED_SUFFIXES or path.name.startswith("~$"):
+        name_lower = path.name.lower()
+        if name_lower.endswith(IGNORED_SUFFIXES_TUPLE) or name_lower.startswith("~$"):
             return
 
         # Safety: only handle files under CLOUD_DIR
@@ -85,58 +115,140 @@ class UploadPool:
             return
 
         now = time.time()
-        # De-bounce rapid repeat events for the same file
-        if now - self._last_event.get(rel, 0) < 1.0:
-            return
-        self._last_event[rel] = now
+        # De-bounce rapid repeat events for the same file (check-and-set is atomic)
+        with self._last_event_lock:
+            if now - self._last_event.get(rel, 0) < 1.0:
+                return
+            self._last_event[rel] = now
+            self._last_event.move_to_end(rel)
+            while len(self._last_event) > self.LAST_EVENT_MAX:
+                self._last_event.popitem(last=False)  # only entries older than the 1 s window matter
 
         # Skip if unchanged and already uploaded
         if self._unchanged(path):
             self._log(f"Skip unchanged {rel}")
             return
+        self._put(path, rel, block)
 
+    def _put(self, path: Path, rel: str, block: bool):
         # Avoid duplicate queue entries
-        try:
-            if path in list(self.q.queue):
+        with self._queued_lock:
+            if path in self._queued:
                 return
-        except Exception:
-            pass
+            self._queued.add(path)
 
-        self.q.put(path)
+        try:
+            self.q.put(path, block=block)
+        except queue.Full:
+            with self._queued_lock:
+                self._queued.discard(path)
+            self._defer(path)
+            self._log(f"Queue full, retry deferred: {rel}")
+            return
         self._log(f"Enqueued file: {rel}")
 
+    # -------- deferred retries --------
+    RETRY_INTERVAL_S = 2.0
+
+    def _defer(self, path: Path):
+        with self._retry_lock:
+            self._retry.add(path)
+
+    def _retry_loop(self):
+        # Own thread, so a blocking put waits for room without tying up a worker
+        while not self.stop_event.wait(self.RETRY_INTERVAL_S):
+            with self._retry_lock:
+                paths, self._retry = self._retry, set()
+            for path in paths:
+                if self.stop_event.is_set():
+                    return
+                if path.exists():  # skips enqueue's debounce, which would drop a quick retry
+                    self._put(path, str(path.relative_to(CLOUD_DIR)), block=True)
+
     # -------- worker loop --------
+    GET_BATCH = 8
+
     def _worker_loop(self):
         tname = threading.current_thread().name
         self._log(f"Worker thread {tname} entering loop")
         while not self.stop_event.is_set():
-            try:
-                path = self.q.get(timeout=0.5)
-            except queue.Empty:
-                continue
-
-            # Respect pause
-            while self.paused.is_set() and not self.stop_event.is_set():
-                time.sleep(0.2)
-
-            try:
-                try:
-                    rel = str(path.relative_to(CLOUD_DIR))
-                except Exception:
-                    rel = str(path)
-                self._log(f"{tname} picked: {rel}")
-                self._process(path)
-            except Exception as e:
-                logging.exception("Error in worker while processing %s: %s", path, e)
-                # Don't crash the worker; mark task done and continue
-            finally:
+            # Blocks with no timeout: an idle worker costs nothing, and stop() wakes it with a sentinel
+            batch = [self.q.get()]
+            # Take a fair share of a backlog in the same wakeup (never more than the other
+            # workers are left with), so bursts of already-synced files skip cheaply.
+            for _ in range(min(self.GET_BATCH - 1, self.q.qsize() // self._num_workers())):
                 try:
+                    batch.append(self.q.get_nowait())
+                except queue.Empty:
+                    break
+
+            for path in batch:
+                if path is None or self.stop_event.is_set():
                     self.q.task_done()
-                except Exception:
-                    pass
+                    continue
+                self._handle(path, tname)
 
+        self._wake_one()  # pass the stop on to the next idle worker
         self._log(f"Worker thread {tname} exiting")
 
+    def _wake_one(self):
+        try:
+            self.q.put_nowait(None)
+        except queue.Full:
+            pass  # queue has work, so no worker is blocked in get()
+
+    def _handle(self, path: Path, tname: str):
+        with self._queued_lock:
+            self._queued.discard(path)  # a change from here on may queue it again
+
+        # Respect pause
+        while self.paused.is_set() and not self.stop_event.is_set():
+            time.sleep(0.2)
+
+        try:
+            try:
+                rel = str(path.relative_to(CLOUD_DIR))
+            except Exception:
+                rel = str(path)
+            self._log(f"{tname} picked: {rel}")
+            self._process(path)
+        except Exception as e:
+            logging.exception("Error in worker while processing %s: %s", path, e)
+            # Don't crash the worker; mark task done and continue
+        finally:
+            try:
+                self.q.task_done()
+            except Exception:
+                pass
+
+    # -------- content hash (cached per file version) --------
+    HASH_CACHE_MAX = 4096
+
+    def _hash_of(self, path: Path, st, fobj=None) -> str | None:
+        if not self.cfg.get("use_sha256"):
+            return None
+        algo = file_hash_algo(self.cfg)
+        key = (st.st_size, st.st_mtime_ns, st.st_ino, algo)
+        with self._hash_lock:
+            sha = self._hash_cache.get(key)
+        if sha is None:
+            if fobj is None:
+                sha = digest_of(path, algo)
+            else:
+                fobj.seek(0)
+                sha = digest_fileobj(fobj, algo)
+                fobj.seek(0)
+            self.remember_hash(st, algo, sha)
+        return sha
+
+    def remember_hash(self, st, algo: str, sha: str):
+        """Record a digest computed elsewhere (e.g. while a backup ZIP was written) for this file version."""
+        key = (st.st_size, st.st_mtime_ns, st.st_ino, algo)
+        with self._hash_lock:
+            if len(self._hash_cache) >= self.HASH_CACHE_MAX:
+                self._hash_cache.pop(next(iter(self._hash_cache)))  # oldest entry
+            self._hash_cache[key] = sha
+
     # -------- unchanged check --------
     def _unchanged(self, path: Path) -> bool:
         try:
@@ -144,16 +256,21 @@ class UploadPool:
         except Exception:
             return True  # outside scope, treat as unchanged/skip
 
+        fm = self.meta.files.get(rel)
+        if not fm or fm.status != "uploaded":
+            return False
         try:
-            size = path.stat().st_size
-            mtime = path.stat().st_mtime
+            st = path.stat()
         except Exception:
             return False  # if we cannot stat, let the worker try later
-
-        sha = sha256_of(path) if self.cfg.get("use_sha256") else None
-        sig_now = make_sig(size, mtime, sha)
-        fm = self.meta.files.get(rel)
-        return bool(fm and fm.status == "uploaded" and fm.sig == sig_now)
+        # Same size + mtime as the uploaded version: unchanged, no need to read the file
+        if sig_matches_stat(fm.sig, st.st_size, st.st_mtime):
+            return True
+        try:
+            sha = self._hash_of(path, st)
+        except Exception:
+            return False
+        return fm.sig == make_sig(st.st_size, st.st_mtime, sha)
 
     # -------- core upload --------
     def _process(self, path: Path):
@@ -166,20 +283,32 @@ class UploadPool:
         # Wait until file is stable & readable (not being written)
         if not wait_for_file_readable(path):
             self._log(f"Locked/changing, retry later: {rel}")
-            time.sleep(1.5)
-            self.enqueue(path)
+            self._defer(path)  # never block a worker on its own queue
             return
 
-        size = path.stat().st_size
-        mtime = path.stat().st_mtime
-        sha = sha256_of(path) if self.cfg.get("use_sha256") else None
-        sig_now = make_sig(size, mtime, sha)
-
+        st = path.stat()
+        size, mtime = st.st_size, st.st_mtime
         fm_prev = self.meta.files.get(rel)
-        if fm_prev and fm_prev.status == "uploaded" and fm_prev.sig == sig_now:
+        if fm_prev and fm_prev.status == "uploaded" and sig_matches_stat(fm_prev.sig, size, mtime):
             self._log(f"Already synced (unchanged): {rel}")
             return
 
+        # One open for hashing and the bot upload, so the upload reads pages the hash just pulled in
+        try:
+            fobj = open_sequential(path)
+        except OSError:
+            fobj = None  # e.g. briefly locked on Windows; hashing/upload open it themselves
+        try:
+            self._upload(path, rel, st, fobj)
+        finally:
+            if fobj is not None:
+                fobj.close()
+
+    def _upload(self, path: Path, rel: str, st, fobj):
+        size, mtime = st.st_size, st.st_mtime
+        sha = self._hash_of(path, st, fobj)
+        sig_now = make_sig(size, mtime, sha)
+
         upload_path = path
         caption = rel
         temp_file = None
@@ -189,17 +318,12 @@ class UploadPool:
             pp = self.cfg.get("encryption_passphrase") or ""
             if pp:
                 self._log(f"Encrypting before upload: {rel}")
-                salt = hashlib.sha256(rel.encode("utf-8")).digest()[:16]
-                key = derive_fernet_key(pp, salt)
-                f = Fernet(key)
-                with open(path, "rb") as s:
-                    enc = f.encrypt(s.read())
+                key = file_key(pp, rel)
                 temp_file = Path(str(path) + ".enc")
-                with open(temp_file, "wb") as o:
-                    o.write(enc)
+                # streamed; size of the encrypted blob
+                size = encrypt_file(fobj if fobj is not None else path, temp_file, key)
                 upload_path = temp_file
                 caption = rel + " (enc)"
-                size = len(enc)  # update size to encrypted blob
             else:
                 self._log("Encryption enabled but passphrase empty. Uploading raw.")
 
@@ -223,7 +347,8 @@ class UploadPool:
             upload_path,
             caption,
             prefer_user=False,
-            progress_cb=progress_cb
+            progress_cb=progress_cb,
+            fobj=fobj if temp_file is None else None
         )
 
         # Clean temp encrypted file
@@ -236,8 +361,9 @@ class UploadPool:
         if mid:
             # Success
             fm = self.meta.files.get(rel) or FileMeta(size=0, mtime=0)
-            fm.size = path.stat().st_size
-            fm.mtime = path.stat().st_mtime
+            # The version that was hashed and sent (size may have been replaced by the .enc size)
+            fm.size = st.st_size
+            fm.mtime = st.st_mtime
             fm.sha256 = sha
             fm.status = "uploaded"
             fm.uploaded_at = dt.datetime.now().isoformat(timespec="seconds")
@@ -250,7 +376,7 @@ class UploadPool:
                 fm.user_message_id = mid
 
             self.meta.files[rel] = fm
-            self.meta.save(METADATA_FILE)
+            self.meta.mark_dirty(rel)
 
             msg = f"Uploaded {rel} via {via} ✓ ({human_size(fm.size)})"
             self._log(msg)
@@ -273,4 +399,4 @@ class UploadPool:
             fm.status = "failed"
             fm.sig = sig_now
             self.meta.files[rel] = fm
-            self.meta.save(METADATA_FILE)
+            self.meta.mark_dirty(rel)